@@ -3,6 +3,22 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
+class UserProfileQuerySet(models.QuerySet):
+    def with_today_calories(self):
+        """Annotate `today_calories` from today's DailyIntake row (same query)"""
+        from django.db.models import FloatField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+        from django.utils import timezone
+        from foodapi.models import DailyIntake
+
+        today = DailyIntake.objects.filter(user=OuterRef("user"), date=timezone.localdate())
+        return self.annotate(
+            today_calories=Coalesce(
+                Subquery(today.values("calories")[:1]), Value(0.0), output_field=FloatField()
+            )
+        )
+
+
 class UserProfile(models.Model):
     GENDER_CHOICES = [('Male', 'Male'), ('Female', 'Female')]
     GOAL_CHOICES = [
@@ -28,10 +44,9 @@ class UserProfile(models.Model):
     
     # Calculated daily target
     daily_calorie_goal = models.FloatField(null=True, blank=True)
-    
-    # ✅ NEW: Track consumed calories for today
-    calories_consumed_today = models.FloatField(default=0)
-    last_reset_date = models.DateField(auto_now_add=True)
+
+    # Calories eaten per day live in foodapi.DailyIntake
+    objects = UserProfileQuerySet.as_manager()
 
     def __str__(self):
         return f"Profile for {self.user.username}"
@@ -50,18 +65,15 @@ class UserProfile(models.Model):
         )
         self.save(update_fields=['daily_calorie_goal'])
     
-    def reset_daily_calories_if_needed(self):
-        """Reset daily calorie counter if it's a new day"""
+    def calories_today(self):
+        """
+        Calories eaten today, from the DailyIntake ledger (the annotation
+        from UserProfile.objects.with_today_calories() when present)
+        """
+        if hasattr(self, "today_calories"):
+            return self.today_calories
         from django.utils import timezone
-        today = timezone.localdate()
-        
-        if self.last_reset_date != today:
-            self.calories_consumed_today = 0
-            self.last_reset_date = today
-            self.save(update_fields=['calories_consumed_today', 'last_reset_date'])
-    
-    def add_calories(self, calories):
-        """Add calories to today's total"""
-        self.reset_daily_calories_if_needed()
-        self.calories_consumed_today += calories
-        self.save(update_fields=['calories_consumed_today'])
\ No newline at end of file
+        from foodapi.models import DailyIntake
+        return DailyIntake.objects.filter(
+            user_id=self.user_id, date=timezone.localdate()
+        ).values_list("calories", flat=True).first() or 0
@@ -9,6 +9,7 @@ User = get_user_model()
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    calories_consumed_today = serializers.SerializerMethodField()
     calories_remaining = serializers.SerializerMethodField()
     
     class Meta:
@@ -17,13 +18,16 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'age', 'gender', 'weight', 'height', 'goal', 'activity_level',
             'daily_calorie_goal', 'calories_consumed_today', 'calories_remaining'
         )
-        read_only_fields = ('daily_calorie_goal', 'calories_consumed_today')
+        read_only_fields = ('daily_calorie_goal',)
     
+    def get_calories_consumed_today(self, obj):
+        """Today's calories from the DailyIntake ledger (no write)"""
+        return obj.calories_today()
+
     def get_calories_remaining(self, obj):
         """Calculate remaining calories for today"""
-        obj.reset_daily_calories_if_needed()
         if obj.daily_calorie_goal:
-            return obj.daily_calorie_goal - obj.calories_consumed_today
+            return obj.daily_calorie_goal - obj.calories_today()
         return 0
     
     def update(self, instance, validated_data):
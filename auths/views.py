@@ -6,6 +6,9 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from django.shortcuts import get_object_or_404
+
+from .models import UserProfile
 from .serializers import SignupSerializer, LoginSerializer,UserProfileSerializer
 
 
@@ -43,4 +46,5 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
 
     def get_object(self):
-        return self.request.user.profile
+        # profile + today's DailyIntake calories in one query
+        return get_object_or_404(UserProfile.objects.with_today_calories(), user=self.request.user)
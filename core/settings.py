@@ -161,3 +161,143 @@ STATIC_URL = 'static/'
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Uploads are hashed while they stream in; anything over 2.5 MB is spooled to
+# a temp file instead of memory. Food photos over FOOD_IMAGE_MAX_BYTES or
+# FOOD_IMAGE_MAX_PIXELS are rejected (413) before being decoded.
+FILE_UPLOAD_HANDLERS = [
+    "foodapi.uploads.HashingMemoryFileUploadHandler",
+    "foodapi.uploads.HashingTemporaryFileUploadHandler",
+]
+FOOD_IMAGE_MAX_BYTES = int(os.getenv("FOOD_IMAGE_MAX_BYTES", 15 * 1024 * 1024))
+FOOD_IMAGE_MAX_PIXELS = int(os.getenv("FOOD_IMAGE_MAX_PIXELS", 50_000_000))
+
+# Stored food images are normalized: re-encoded as FOOD_IMAGE_FORMAT with the
+# longer side bounded to FOOD_IMAGE_MASTER_MAX_SIDE, plus one thumbnail per
+# FOOD_IMAGE_THUMBNAIL_SIZES entry. The log API returns the
+# FOOD_LOG_THUMBNAIL_SIZE thumbnail unless ?full=true is passed.
+# Master decode + encoding run on IMAGE_PERSIST_WORKERS background threads,
+# from a spooled copy of the upload; requests only decode near INFERENCE_IMGSZ.
+FOOD_IMAGE_FORMAT = os.getenv("FOOD_IMAGE_FORMAT", "WEBP")
+FOOD_IMAGE_QUALITY = int(os.getenv("FOOD_IMAGE_QUALITY", 82))
+FOOD_IMAGE_MASTER_MAX_SIDE = int(os.getenv("FOOD_IMAGE_MASTER_MAX_SIDE", 1600))
+FOOD_IMAGE_THUMBNAIL_SIZES = [
+    int(size) for size in os.getenv("FOOD_IMAGE_THUMBNAIL_SIZES", "256,640").split(",")
+]
+FOOD_LOG_THUMBNAIL_SIZE = int(os.getenv("FOOD_LOG_THUMBNAIL_SIZE", 256))
+IMAGE_PERSIST_WORKERS = int(os.getenv("IMAGE_PERSIST_WORKERS", 2))
+
+
+# Caches
+# "recognition" holds predictions keyed by image content hash + model version.
+# LocMemCache evicts least-recently-used entries past MAX_ENTRIES; set
+# REDIS_URL to share it across web workers (bounded by Redis maxmemory).
+# "default" carries the food catalog version stamp (foodapi/catalog.py).
+RECOGNITION_CACHE_TTL = int(os.getenv("RECOGNITION_CACHE_TTL", 60 * 60))
+RECOGNITION_CACHE_MAX_ENTRIES = int(os.getenv("RECOGNITION_CACHE_MAX_ENTRIES", 5000))
+
+# recognition_id is a signed token carrying the recognised result (no server
+# state, valid on every worker); eat-food accepts it for this many seconds.
+RECOGNITION_SESSION_TTL = int(os.getenv("RECOGNITION_SESSION_TTL", 15 * 60))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+def _bounded_cache(name, timeout, max_entries):
+    if REDIS_URL:
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": name,
+            "TIMEOUT": timeout,
+        }
+    return {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": name,
+        "TIMEOUT": timeout,
+        "OPTIONS": {"MAX_ENTRIES": max_entries},
+    }
+
+
+CACHES = {
+    "default": _bounded_cache("default", 300, 300),
+    "recognition": _bounded_cache(
+        "recognition", RECOGNITION_CACHE_TTL, RECOGNITION_CACHE_MAX_ENTRIES
+    ),
+}
+
+
+# Food catalog snapshot (foodapi/catalog.py)
+# Each process re-reads the shared version stamp at most every
+# CATALOG_VERSION_CHECK_SECONDS; without REDIS_URL other processes only see
+# edits after a background re-read, every CATALOG_MAX_AGE seconds.
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", 5))
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", 300))
+
+
+# Food recognition inference
+# Concurrent recognize-food requests are grouped into one predict call of up
+# to INFERENCE_MAX_BATCH_SIZE images, waiting at most INFERENCE_MAX_WAIT_MS.
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 16))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+
+# Admission control: beyond INFERENCE_MAX_QUEUE_DEPTH waiting images new
+# requests get 503 + Retry-After immediately, and images still queued after
+# INFERENCE_QUEUE_TIMEOUT_MS are dropped (503) instead of reaching the model.
+INFERENCE_MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", 64))
+INFERENCE_QUEUE_TIMEOUT_MS = float(os.getenv("INFERENCE_QUEUE_TIMEOUT_MS", 2000))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", 1))
+
+# Inference runtime: "torch" (models/best.pt), "onnx" or "openvino" (exported
+# with `python manage.py export_model --format onnx|openvino`), or "onnx_int8"
+# (INT8 quantized, `python manage.py quantize_model <calibration images>`).
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+# Max images accepted by /api/recognize-food/batch/ in one request.
+RECOGNITION_BATCH_MAX_IMAGES = int(os.getenv("RECOGNITION_BATCH_MAX_IMAGES", 8))
+
+# Max entries accepted by /api/meal-nutrition/ in one request.
+MEAL_MAX_ITEMS = int(os.getenv("MEAL_MAX_ITEMS", 50))
+
+# /api/trends/: accepted ?days= windows, and how close to daily_calorie_goal
+# (fraction either way) a logged day counts as on target.
+TRENDS_DAYS = [7, 30, 90]
+DAILY_GOAL_TOLERANCE = float(os.getenv("DAILY_GOAL_TOLERANCE", 0.1))
+
+# Upper bound for ?limit= on /api/food-search/.
+FOOD_SEARCH_MAX_RESULTS = int(os.getenv("FOOD_SEARCH_MAX_RESULTS", 50))
+
+# Threads the async recognition view (/api/recognize-food/async/) uses for
+# multipart parsing, hashing and decoding, keeping the event loop free.
+RECOGNITION_ASYNC_THREADS = int(os.getenv("RECOGNITION_ASYNC_THREADS", 8))
+
+# Optional confidence-gated cascade: predict at INFERENCE_CASCADE_IMGSZ first and
+# re-run at INFERENCE_IMGSZ only when top-1 confidence < INFERENCE_CASCADE_THRESHOLD.
+# 0 disables it. Needs the torch backend or a dynamic-shape export.
+INFERENCE_CASCADE_IMGSZ = int(os.getenv("INFERENCE_CASCADE_IMGSZ", 0))
+INFERENCE_CASCADE_THRESHOLD = float(os.getenv("INFERENCE_CASCADE_THRESHOLD", 0.85))
+
+# Classifier input size; uploads are decoded (JPEG draft mode) close to it.
+INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", 224))
+
+# Serving processes (core/wsgi.py, core/asgi.py) load the model at startup and
+# run INFERENCE_WARMUP_ROUNDS dummy predicts before reporting ready on
+# /api/ready/. Everything else (manage.py commands, tests) loads it lazily.
+# The load happens when the WSGI/ASGI module is imported: run gunicorn with
+# --preload to do it once in the master and share the weights copy-on-write;
+# otherwise each worker loads its own copy after the fork.
+INFERENCE_PRELOAD = os.getenv("INFERENCE_PRELOAD", "true").lower() == "true"
+INFERENCE_WARMUP_ROUNDS = int(os.getenv("INFERENCE_WARMUP_ROUNDS", 2))
+
+# Shared inference pool (python manage.py run_inference_pool). When set, web
+# workers send decoded images over this Unix socket instead of loading the
+# model themselves; parallelism is INFERENCE_POOL_WORKERS processes with
+# INFERENCE_POOL_TORCH_THREADS torch threads each.
+INFERENCE_POOL_SOCKET = os.getenv("INFERENCE_POOL_SOCKET", "")
+INFERENCE_POOL_WORKERS = int(os.getenv("INFERENCE_POOL_WORKERS", 2))
+INFERENCE_POOL_TORCH_THREADS = int(os.getenv("INFERENCE_POOL_TORCH_THREADS", 1))
+# Max seconds for one pool round trip; dead pool workers are respawned and
+# their in-flight requests failed.
+INFERENCE_POOL_TIMEOUT = float(os.getenv("INFERENCE_POOL_TIMEOUT", 10))
+
+# Max seconds a recognition request waits for its predictions (503 after).
+INFERENCE_RESULT_TIMEOUT = float(os.getenv("INFERENCE_RESULT_TIMEOUT", 30))
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Load + warm the food classifier in serving processes only. Before the
+# worker fork only with `gunicorn --preload`; otherwise once per worker.
+from django.conf import settings  # noqa: E402
+
+if settings.INFERENCE_PRELOAD:
+    from foodapi.inference import registry  # noqa: E402
+    registry.preload()
@@ -0,0 +1,100 @@
+"""
+Native async recognition for the ASGI deployment (core/asgi.py).
+
+DRF views are sync-only, so this is a plain Django async view returning the
+same payload as FoodRecognitionAPIView. The event loop never blocks:
+multipart parsing, decoding and the storage write run on a bounded thread pool,
+and the predict itself is awaited as a future from the shared batching
+scheduler.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .images import ImageRejected
+from .inference import InferenceTimeout, InferenceUnavailable, scheduler
+from .recognition import finish_predictions, open_session, prepare_upload
+from .views import recognition_response
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "RECOGNITION_ASYNC_THREADS", 8),
+                thread_name_prefix="recognition-async",
+            )
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def _get_image(request):
+    image_file = request.FILES.get("image")
+    # set by the upload handlers when the body passed FOOD_IMAGE_MAX_BYTES
+    rejected = getattr(request, "upload_rejected", None)
+    if rejected:
+        raise rejected
+    return image_file
+
+
+@csrf_exempt
+@require_POST
+async def recognize_food_async(request):
+    """
+    POST image -> returns predicted food name, confidence, portion_type
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+
+    try:
+        image_file = await loop.run_in_executor(executor, _get_image, request)
+        if not image_file:
+            return JsonResponse({"error": "Image is required"}, status=400)
+
+        result, image = await loop.run_in_executor(executor, prepare_upload, image_file)
+
+        if image is not None:
+            future = scheduler.submit(image)
+            try:
+                prediction = await asyncio.wait_for(
+                    asyncio.wrap_future(future),
+                    timeout=getattr(settings, "INFERENCE_RESULT_TIMEOUT", 30),
+                )
+            except asyncio.TimeoutError:
+                future.cancel()
+                raise InferenceTimeout("Recognition timed out, try again")
+            await sync_to_async(finish_predictions)([result], [prediction])
+        await loop.run_in_executor(executor, open_session, result)
+
+        print(
+            f"[FoodRecognition] Detected: {result['food']} | "
+            f"Confidence: {result['confidence']:.4f} | "
+            f"PortionType: {result['portion_type']} | "
+            f"Stage: {result['stage']} | async"
+            f"{' | cached' if result['cached'] else ''}"
+        )
+
+        return JsonResponse(recognition_response(request, result))
+
+    except ImageRejected as e:
+        return JsonResponse({"error": str(e)}, status=413)
+    except InferenceUnavailable as e:
+        return JsonResponse(
+            {"error": str(e)},
+            status=503,
+            headers={"Retry-After": str(getattr(settings, "INFERENCE_RETRY_AFTER", 1))},
+        )
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
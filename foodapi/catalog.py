@@ -0,0 +1,137 @@
+"""
+Process-local, immutable snapshot of the active food catalog.
+
+The catalog is small and almost never changes, so recognition, nutrition and
+eat-food read it from memory instead of querying FoodItem / FoodNutrition.
+Writes invalidate it through post_save / post_delete signals (foodapi/signals.py),
+which also bump a version stamp in the default cache so other processes reload.
+"""
+import threading
+import time
+import uuid
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+
+from utils.enums import NUTRITION_FIELDS
+
+from .models import FoodItem
+
+# Same attribute names as FoodNutrition, so compute_nutrition() accepts either
+NutritionValues = namedtuple("NutritionValues", NUTRITION_FIELDS)
+
+# Quacks like a FoodItem for compute_nutrition(): .portion_type, .nutrition (None if missing)
+CatalogEntry = namedtuple("CatalogEntry", ["id", "name", "portion_type", "nutrition"])
+
+VERSION_KEY = "foodapi:catalog_version"
+
+
+class Catalog:
+    def __init__(self, entries, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_name = MappingProxyType({e.name: e for e in entries})
+        self.by_id = MappingProxyType({e.id: e for e in entries})
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def __len__(self):
+        return len(self.by_name)
+
+
+def _load(version):
+    """
+    One query for the whole active catalog
+    """
+    rows = (
+        FoodItem.objects.filter(is_active=True)
+        .values_list("id", "name", "portion_type", "nutrition__id", *(f"nutrition__{f}" for f in NUTRITION_FIELDS))
+    )
+    entries = []
+    for food_id, name, portion_type, nutrition_id, *values in rows:
+        nutrition = NutritionValues(*values) if nutrition_id is not None else None
+        entries.append(CatalogEntry(food_id, name, portion_type, nutrition))
+    return Catalog(entries, version)
+
+
+_catalog = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_catalog():
+    """
+    Current snapshot. The shared version stamp is consulted at most every
+    CATALOG_VERSION_CHECK_SECONDS; CATALOG_MAX_AGE bounds staleness when the
+    default cache is not shared between processes.
+    """
+    global _catalog, _checked_at
+    now = time.monotonic()
+    catalog = _catalog
+    if catalog is not None and now - _checked_at < getattr(settings, "CATALOG_VERSION_CHECK_SECONDS", 5):
+        return catalog
+
+    with _lock:
+        version = _shared_version()
+        catalog = _catalog
+        if catalog is None or catalog.version != version:
+            catalog = _catalog = _load(version)
+        elif now - catalog.loaded_at > getattr(settings, "CATALOG_MAX_AGE", 300):
+            # same version: keep serving this snapshot; without a shared stamp
+            # other processes' edits are only visible by re-reading, done off
+            # the request path
+            catalog.loaded_at = now
+            if not _version_is_shared():
+                threading.Thread(
+                    target=_reload_in_background, args=(catalog,), name="catalog-reload", daemon=True
+                ).start()
+        _checked_at = now
+    return catalog
+
+
+def _version_is_shared():
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def _reload_in_background(stale):
+    global _catalog
+    try:
+        fresh = _load(stale.version)
+        with _lock:
+            # unless invalidated / replaced meanwhile
+            if _catalog is stale:
+                _catalog = fresh
+    except Exception as e:
+        print(f"[FoodCatalog] Background reload failed: {e}")
+    finally:
+        connection.close()
+
+
+def get_food(name):
+    """
+    Active catalog entry by (normalised) name, or None
+    """
+    return get_catalog().get(name)
+
+
+def invalidate():
+    """
+    Drop this process's snapshot and bump the shared version stamp
+    """
+    global _catalog
+    with _lock:
+        _catalog = None
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,194 @@
+"""
+Streaming, batched upsert of FoodItem + FoodNutrition rows.
+
+A row is a flat mapping: name, portion_type (COUNTABLE / PORTION), optional
+is_active, and any of the FoodNutrition columns (calories_per_piece,
+protein_small, ...). Only what a row supplies is written: without is_active
+an existing food keeps its flag (new foods are active), and nutrition
+columns that are missing or empty keep their stored value (NDJSON null
+clears one). Rows without any nutrition column only upsert the item.
+"""
+import csv
+import io
+import json
+import sys
+
+from django.db import transaction
+
+from utils.enums import NUTRITION_FIELDS, PortionType
+from . import catalog
+from .models import FoodItem, FoodNutrition
+
+FORMATS = ("csv", "ndjson")
+
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path):
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_rows(path, fmt=None):
+    """
+    Yield (line_no, row dict) from a CSV or NDJSON file ("-" = stdin)
+    without loading it into memory.
+    """
+    fmt = fmt or detect_format(path)
+    f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, RowError(f"invalid JSON: {e}")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _number(value, field):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field}: not a number ({value!r})")
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise RowError(f"{field}: expected a string ({value!r})")
+    return value.strip()
+
+
+def parse_row(row):
+    """
+    -> (name, portion_type, is_active | None, {supplied nutrition column: value} | None);
+    RowError if invalid
+    """
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError(f"expected an object, got {type(row).__name__}")
+
+    name = _text(row, "name").lower()
+    if not name:
+        raise RowError("name is required")
+    if len(name) > FoodItem._meta.get_field("name").max_length:
+        raise RowError("name is too long")
+
+    portion_type = _text(row, "portion_type").upper()
+    if portion_type not in PortionType.values:
+        raise RowError(f"portion_type must be one of {', '.join(PortionType.values)}")
+
+    is_active = row.get("is_active")
+    if is_active == "":
+        is_active = None
+    elif is_active is not None and not isinstance(is_active, bool):
+        if not isinstance(is_active, str):
+            raise RowError(f"is_active: expected a boolean or string ({is_active!r})")
+        is_active = is_active.strip().lower() in TRUE_VALUES
+
+    nutrition = {
+        field: _number(row[field], field)
+        for field in NUTRITION_FIELDS
+        if field in row and row[field] != ""
+    } or None
+
+    return name, portion_type, is_active, nutrition
+
+
+def _grouped(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+def _upsert_chunk(chunk):
+    """
+    One transaction. Rows are grouped by the columns they supply, since
+    update_fields is per statement: usually one upsert for items, one id
+    read-back and one upsert for nutrition.
+    """
+    with transaction.atomic():
+        by_flag = _grouped(chunk.items(), key=lambda item: item[1][1] is not None)
+        for has_flag, items in by_flag.items():
+            FoodItem.objects.bulk_create(
+                [
+                    FoodItem(name=name, portion_type=portion_type, **({"is_active": is_active} if has_flag else {}))
+                    for name, (portion_type, is_active, _) in items
+                ],
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=["portion_type", "is_active"] if has_flag else ["portion_type"],
+            )
+
+        with_nutrition = {name: values for name, (_, _, values) in chunk.items() if values is not None}
+        if not with_nutrition:
+            return 0
+
+        # pks are not returned by every backend on upsert
+        ids = dict(FoodItem.objects.filter(name__in=with_nutrition).values_list("name", "id"))
+        by_columns = _grouped(with_nutrition.items(), key=lambda item: tuple(sorted(item[1])))
+        for columns, items in by_columns.items():
+            FoodNutrition.objects.bulk_create(
+                [FoodNutrition(food_id=ids[name], **values) for name, values in items],
+                update_conflicts=True,
+                unique_fields=["food"],
+                update_fields=list(columns),
+            )
+        return len(with_nutrition)
+
+
+def upsert_catalog(rows, batch_size=1000, on_error=None, on_batch=None):
+    """
+    Upsert (line_no, row) pairs in chunked transactions; later duplicates of
+    a name within a chunk win. bulk_create sends no model signals, so the
+    food catalog snapshot is invalidated once at the end.
+
+    -> {"rows", "items", "nutrition", "errors"}
+    """
+    stats = {"rows": 0, "items": 0, "nutrition": 0, "errors": 0}
+    chunk = {}
+
+    def flush():
+        stats["nutrition"] += _upsert_chunk(chunk)
+        stats["items"] += len(chunk)
+        chunk.clear()
+        if on_batch:
+            on_batch(stats)
+
+    try:
+        for line_no, row in rows:
+            stats["rows"] += 1
+            try:
+                name, portion_type, is_active, nutrition = parse_row(row)
+            except RowError as e:
+                stats["errors"] += 1
+                if on_error:
+                    on_error(line_no, e)
+                continue
+            chunk[name] = (portion_type, is_active, nutrition)
+            if len(chunk) >= batch_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        if stats["items"]:
+            catalog.invalidate()
+
+    return stats
@@ -0,0 +1,343 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+UPLOAD_DIR = "food_detection"
+
+# files the model / normalization commands pick up from a directory
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+class ImageRejected(ValueError):
+    """
+    Upload exceeds FOOD_IMAGE_MAX_BYTES / FOOD_IMAGE_MAX_PIXELS (HTTP 413).
+    """
+
+
+def chunks(iterable, size):
+    """
+    Lists of up to `size` items, for the batched image commands
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def upload_digest(image_file) -> str:
+    """
+    sha256 of an upload. The hashing upload handlers (foodapi/uploads.py)
+    compute it while Django streams the request body, so this is normally
+    free; otherwise it is computed chunk by chunk.
+    """
+    digest = getattr(image_file, "sha256", None)
+    if digest:
+        return digest
+
+    sha256 = hashlib.sha256()
+    for chunk in image_file.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def max_upload_bytes():
+    return getattr(settings, "FOOD_IMAGE_MAX_BYTES", 15 * 1024 * 1024)
+
+
+def check_upload_size(image_file):
+    max_bytes = max_upload_bytes()
+    if image_file.size and image_file.size > max_bytes:
+        raise ImageRejected(f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+
+
+def _image_format():
+    return getattr(settings, "FOOD_IMAGE_FORMAT", "WEBP").upper()
+
+
+def master_path(digest: str) -> str:
+    """
+    Content-addressed normalized image: food_detection/ab/abcdef....webp
+    Identical uploads map to the same file.
+    """
+    return f"{UPLOAD_DIR}/{digest[:2]}/{digest}.{_image_format().lower()}"
+
+
+def thumbnail_path(path: str, size: int) -> str:
+    """
+    food_detection/ab/<digest>.webp -> food_detection/thumbs/256/ab/<digest>.webp
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return f"{UPLOAD_DIR}/thumbs/{size}/{name[:2]}/{name}.{_image_format().lower()}"
+
+
+def is_normalized(path: str) -> bool:
+    name = os.path.splitext(os.path.basename(path or ""))[0]
+    return bool(name) and path == master_path(name)
+
+
+def _encode(image) -> ContentFile:
+    buffer = io.BytesIO()
+    image.save(buffer, _image_format(), quality=getattr(settings, "FOOD_IMAGE_QUALITY", 82))
+    return ContentFile(buffer.getvalue())
+
+
+def _stored_set(path):
+    return [path] + [
+        thumbnail_path(path, size)
+        for size in getattr(settings, "FOOD_IMAGE_THUMBNAIL_SIZES", [256, 640])
+    ]
+
+
+def touch(path: str):
+    """
+    Refresh the mtime of a stored master + thumbnails: gc_food_images keeps
+    unreferenced files for a grace period counted from the mtime, and a
+    content-addressed file can be handed out again long after it was written.
+    Storages without local paths are left alone.
+    """
+    for name in _stored_set(path):
+        try:
+            os.utime(default_storage.path(name))
+        except (NotImplementedError, FileNotFoundError):
+            continue
+
+
+def store_normalized(image, digest: str) -> str:
+    """
+    Save the bounded-resolution master and every thumbnail size for a decoded
+    image, unless that content is already stored -> master path
+    """
+    path = master_path(digest)
+    if default_storage.exists(path):
+        touch(path)
+        return path
+
+    for size in getattr(settings, "FOOD_IMAGE_THUMBNAIL_SIZES", [256, 640]):
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        _write(thumbnail_path(path, size), _encode(thumb))
+
+    # master last: its existence means the set is complete
+    return _write(path, _encode(image))
+
+
+def _write(name: str, content) -> str:
+    """
+    Save under exactly `name`, never a storage-renamed copy: names are
+    content hashes, so a concurrent writer of the same name wrote the same
+    bytes and "already exists" is a hit.
+    """
+    try:
+        full_path = default_storage.path(name)
+    except NotImplementedError:
+        saved = default_storage.save(name, content)
+        if saved != name:
+            # lost a race on a storage that renames instead of overwriting
+            default_storage.delete(saved)
+        return name
+
+    # local files: temp file + atomic rename, so readers never see a partial image
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.read())
+        os.chmod(tmp_path, getattr(default_storage, "file_permissions_mode", None) or 0o644)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return name
+
+
+# ---------- background persistence ----------
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# master path -> Future for writes still in flight in this process
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_PERSIST_WORKERS", 2),
+                thread_name_prefix="image-persist",
+            )
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def spool_copy(image_file):
+    """
+    Copy of an upload that outlives the request (Django deletes its temp
+    file at request end): in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE, on
+    disk beyond.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    image_file.seek(0)
+    for chunk in image_file.chunks():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def _store_upload(spool, digest):
+    """
+    Runs in the persister: decode the master from the spooled upload
+    (skipped when that content is already stored) and save it + thumbnails
+    """
+    try:
+        path = master_path(digest)
+        if default_storage.exists(path):
+            touch(path)
+            return path
+        return store_normalized(decode_master(spool), digest)
+    except Exception as e:
+        print(f"[FoodRecognition] Failed to store {digest}: {e}")
+        raise
+    finally:
+        spool.close()
+
+
+def store_normalized_async(image_file, digest: str):
+    """
+    Decode, encode + save master and thumbnails for an upload off the
+    request path -> Future[path]. Concurrent identical uploads share the
+    write already in flight.
+    """
+    path = master_path(digest)
+    future = _pending.get(path)
+    if future is not None:
+        return future
+
+    spool = spool_copy(image_file)
+    with _pending_lock:
+        future = _pending.get(path)
+        if future is None:
+            future = _pending[path] = _get_executor().submit(_store_upload, spool, digest)
+            spool = None
+    if spool is not None:
+        spool.close()
+    future.add_done_callback(lambda f: _discard_pending(path, f))
+    return future
+
+
+def _discard_pending(path, future):
+    with _pending_lock:
+        if _pending.get(path) is future:
+            del _pending[path]
+
+
+def is_stored(path: str, timeout: float = 5) -> bool:
+    """
+    Cheap existence check for a stored food image. If this process is still
+    writing it (eat-food right after recognition), wait for that write.
+    """
+    future = _pending.get(path)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            return False
+    return default_storage.exists(path)
+
+
+# ---------- decoding ----------
+
+def to_array(image):
+    """
+    PIL RGB image -> contiguous BGR uint8 array (ultralytics' numpy layout)
+    """
+    import numpy as np
+    if isinstance(image, np.ndarray):
+        return image
+    return np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+
+
+def open_checked(source):
+    """
+    Open bytes or a file object; only the header is read, and it is checked
+    against FOOD_IMAGE_MAX_PIXELS before any pixel is decoded.
+    """
+    max_pixels = getattr(settings, "FOOD_IMAGE_MAX_PIXELS", 50_000_000)
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    else:
+        source.seek(0)
+
+    image = Image.open(source)
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageRejected(f"Image is larger than {max_pixels // 1_000_000} megapixels")
+    return image
+
+
+def _draft(image, max_side):
+    """
+    JPEG: decode at the smallest DCT scale (1/2, 1/4, 1/8) that keeps the
+    longer side >= max_side; no-op for other formats.
+    """
+    scale = min(1.0, max_side / max(image.size))
+    image.draft("RGB", (max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+
+
+def model_array(image, imgsz: int = None):
+    """
+    Decoded RGB image -> model-ready array, integer-reduced close to `imgsz`
+    """
+    imgsz = imgsz or getattr(settings, "INFERENCE_IMGSZ", 224)
+    factor = min(image.size) // imgsz
+    if factor >= 2:
+        image = image.reduce(factor)
+    return to_array(image)
+
+
+def decode_for_model(source, imgsz: int = None):
+    """
+    Decode bytes or a file object straight to a model-ready array.
+
+    JPEGs are decoded with draft() at the smallest DCT scale that still
+    covers `imgsz`, so a 12 MP photo never gets fully decoded just to be
+    resized to 224 px. EXIF orientation is applied like decode_master().
+    """
+    imgsz = imgsz or getattr(settings, "INFERENCE_IMGSZ", 224)
+    image = open_checked(source)
+    image.draft("RGB", (imgsz, imgsz))
+    image = ImageOps.exif_transpose(image)
+    return model_array(image.convert("RGB"), imgsz)
+
+
+def decode_master(source):
+    """
+    Decode near FOOD_IMAGE_MASTER_MAX_SIDE, apply EXIF orientation and bound
+    the longer side to it -> the RGB image that gets stored
+    """
+    max_side = getattr(settings, "FOOD_IMAGE_MASTER_MAX_SIDE", 1600)
+    image = open_checked(source)
+    _draft(image, max_side)
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
@@ -0,0 +1,433 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+MODEL_PATH = "models/best.pt"
+
+# INFERENCE_BACKEND -> weights; export with `python manage.py export_model`
+BACKEND_PATHS = {
+    "torch": MODEL_PATH,
+    "onnx": "models/best.onnx",
+    # post-training INT8 quantization of best.onnx (`python manage.py quantize_model`)
+    "onnx_int8": "models/best.int8.onnx",
+    "openvino": "models/best_openvino_model",
+}
+
+
+def model_path(backend=None):
+    backend = backend or getattr(settings, "INFERENCE_BACKEND", "torch")
+    if backend not in BACKEND_PATHS:
+        raise ImproperlyConfigured(
+            f"INFERENCE_BACKEND must be one of {', '.join(BACKEND_PATHS)}, got '{backend}'"
+        )
+    return BACKEND_PATHS[backend]
+
+
+def load_model(backend=None):
+    from ultralytics import YOLO
+    return YOLO(model_path(backend), task="classify")
+
+
+# label/confidence of the top-1 class, `top` = [(label, confidence), ...] top-5,
+# `stage` = which cascade pass answered ("low" / "full")
+Prediction = namedtuple("Prediction", ["label", "confidence", "top", "stage"], defaults=["full"])
+
+
+def _label(model, index):
+    return str(model.names[index]).strip().lower()
+
+
+def predict_batch(model, images, **predict_kwargs):
+    """
+    Run the classifier on a list of images -> [Prediction, ...]
+    """
+    results = model.predict(images, verbose=False, **predict_kwargs)
+    predictions = []
+    for result in results:
+        probs = result.probs
+        top = [
+            (_label(model, index), float(conf))
+            for index, conf in zip(probs.top5, probs.top5conf.tolist())
+        ]
+        predictions.append(Prediction(_label(model, probs.top1), float(probs.top1conf), top))
+    return predictions
+
+
+def predict_cascade(model, images, low_imgsz, threshold, imgsz=None):
+    """
+    Confidence-gated cascade: everything runs at `low_imgsz` first and only
+    images whose top-1 confidence is below `threshold` are re-run at full size.
+    """
+    imgsz = imgsz or getattr(settings, "INFERENCE_IMGSZ", 224)
+    predictions = [
+        p._replace(stage="low") for p in predict_batch(model, images, imgsz=low_imgsz)
+    ]
+
+    unsure = [i for i, p in enumerate(predictions) if p.confidence < threshold]
+    if unsure:
+        rerun = predict_batch(model, [images[i] for i in unsure], imgsz=imgsz)
+        for i, p in zip(unsure, rerun):
+            predictions[i] = p
+    return predictions
+
+
+def predict(model, images):
+    """
+    Serving predict: cascade when INFERENCE_CASCADE_IMGSZ is set, else full size
+    """
+    low_imgsz = getattr(settings, "INFERENCE_CASCADE_IMGSZ", 0)
+    if low_imgsz:
+        return predict_cascade(
+            model, images, low_imgsz, getattr(settings, "INFERENCE_CASCADE_THRESHOLD", 0.85)
+        )
+    return predict_batch(model, images)
+
+
+def weights_version(path):
+    """
+    sha256 prefix of a weights file, or of every file in an exported model dir
+    """
+    files = [path]
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+
+    digest = hashlib.sha256()
+    for file in files:
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_runner():
+    """
+    In-process model by default; the shared worker pool when
+    INFERENCE_POOL_SOCKET is set (web workers then never import torch).
+    """
+    socket_path = getattr(settings, "INFERENCE_POOL_SOCKET", "")
+    if socket_path:
+        from .inference_server import InferencePoolClient
+        return InferencePoolClient(socket_path).run_batch
+
+    model = load_model()
+    return lambda images: predict(model, images)
+
+
+class ModelRegistry:
+    """
+    Owns this process's classifier (or pool client).
+
+    Nothing is loaded at import, so management commands and the test runner
+    never pay for torch. Serving entry points (core/wsgi.py, core/asgi.py)
+    call preload(), which loads and warms the model when the app module is
+    imported. Only with `gunicorn --preload` does that happen before the fork
+    (workers then share the weights copy-on-write); without it every worker
+    loads and warms its own copy after forking.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runner = None
+        self._ready = threading.Event()
+        self._version = None
+        self.error = None
+
+    def model_version(self):
+        """
+        Short content hash of the serving weights; part of every cached prediction key.
+        """
+        if self._version is None:
+            self._version = weights_version(model_path())
+        return self._version
+
+    def get_runner(self):
+        if self._runner is None:
+            with self._lock:
+                if self._runner is None:
+                    self._runner = build_runner()
+        return self._runner
+
+    def run_batch(self, images):
+        results = self.get_runner()(images)
+        self._ready.set()
+        return results
+
+    def warm_up(self, rounds=2):
+        """
+        Dummy predicts so the first real request skips predictor setup/fusing.
+        Runs single-threaded: torch's OpenMP pool must not exist before fork.
+        """
+        from PIL import Image
+        from .images import to_array
+        dummy = to_array(Image.new("RGB", (224, 224)))
+
+        torch = None
+        if not getattr(settings, "INFERENCE_POOL_SOCKET", ""):
+            import torch
+            threads = torch.get_num_threads()
+            torch.set_num_threads(1)
+        try:
+            for _ in range(rounds):
+                self.run_batch([dummy])
+        finally:
+            if torch is not None:
+                torch.set_num_threads(threads)
+
+    def preload(self):
+        try:
+            self.get_runner()
+            self.warm_up(getattr(settings, "INFERENCE_WARMUP_ROUNDS", 2))
+        except Exception as e:
+            # stay up and report not-ready; requests retry the load lazily
+            self.error = str(e)
+            print(f"[Inference] Preload failed: {e}")
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "loaded": self._runner is not None,
+            "model_version": self._version,
+            "error": self.error,
+        }
+
+
+registry = ModelRegistry()
+
+
+class InferenceUnavailable(Exception):
+    """
+    Inference was not attempted; the client should retry later (HTTP 503).
+    """
+
+
+class InferenceOverloaded(InferenceUnavailable):
+    pass
+
+
+class InferenceDeadlineExceeded(InferenceUnavailable):
+    pass
+
+
+class InferenceTimeout(InferenceUnavailable):
+    """
+    The model / pool did not answer in time (e.g. a pool worker died).
+    """
+
+
+class BatchMetrics:
+    """
+    Counters for tuning the batching window (batch sizes + queue wait) and
+    for autoscaling (queue depth, rejected / expired requests).
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.images = 0
+        self.batch_sizes = {}
+        self.predict_seconds = 0.0
+        self.rejected = 0
+        self.expired = 0
+        self.cancelled = 0
+        self.stages = {}
+        self._waits = deque(maxlen=window)
+
+    def record(self, batch_size, waits, predict_seconds, stages=()):
+        with self._lock:
+            for stage in stages:
+                self.stages[stage] = self.stages.get(stage, 0) + 1
+            self.batches += 1
+            self.images += batch_size
+            self.batch_sizes[batch_size] = self.batch_sizes.get(batch_size, 0) + 1
+            self.predict_seconds += predict_seconds
+            self._waits.extend(waits)
+
+    def record_dropped(self, rejected=0, expired=0, cancelled=0):
+        with self._lock:
+            self.rejected += rejected
+            self.expired += expired
+            self.cancelled += cancelled
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            batches = self.batches
+            images = self.images
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+            predict_seconds = self.predict_seconds
+            rejected, expired, cancelled = self.rejected, self.expired, self.cancelled
+            stages = dict(self.stages)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000
+
+        return {
+            "batches": batches,
+            "images": images,
+            "avg_batch_size": round(images / batches, 2) if batches else 0,
+            "batch_sizes": batch_sizes,
+            "avg_predict_ms": round(predict_seconds / batches * 1000, 2) if batches else 0,
+            "queue_wait_ms": {
+                "p50": round(percentile(0.50), 2),
+                "p95": round(percentile(0.95), 2),
+                "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+            },
+            "stages": stages,
+            "rejected": rejected,
+            "expired": expired,
+            "cancelled": cancelled,
+        }
+
+
+class InferenceScheduler:
+    """
+    Collects concurrent predict calls for up to `max_wait_ms` (or until
+    `max_batch_size` images are waiting) and runs them as one batch.
+
+    Admission control: at most `max_queue_depth` images may wait; beyond that
+    submit raises InferenceOverloaded. Images still queued `queue_timeout_ms`
+    after submission (or whose caller cancelled) are dropped before the model.
+    """
+
+    def __init__(self, run_batch, max_batch_size=16, max_wait_ms=10,
+                 max_queue_depth=64, queue_timeout_ms=2000):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.max_queue_depth = max(1, int(max_queue_depth))
+        self.queue_timeout = max(0.0, float(queue_timeout_ms)) / 1000
+        self.metrics = BatchMetrics()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout=timeout)
+
+    def submit(self, image):
+        return self.submit_many([image])[0]
+
+    def submit_many(self, images):
+        """
+        Enqueue several images back to back so they share a batch
+        (as long as they fit in max_batch_size) -> [Future, ...]
+
+        All or nothing: raises InferenceOverloaded if they do not fit in the queue.
+        """
+        self._ensure_worker()
+        with self._submit_lock:
+            if self._queue.qsize() + len(images) > self.max_queue_depth:
+                self.metrics.record_dropped(rejected=len(images))
+                raise InferenceOverloaded("Recognition is overloaded, retry shortly")
+
+            enqueued = time.monotonic()
+            futures = []
+            for image in images:
+                future = Future()
+                self._queue.put((image, future, enqueued))
+                futures.append(future)
+        return futures
+
+    def _ensure_worker(self):
+        # threads do not survive fork(), so start one per process
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _admit(self, batch):
+        """
+        Drop cancelled and past-deadline items so abandoned work never reaches the model.
+        """
+        now = time.monotonic()
+        live, expired, cancelled = [], 0, 0
+        for item in batch:
+            _, future, enqueued = item
+            if not future.set_running_or_notify_cancel():
+                cancelled += 1
+            elif self.queue_timeout and now - enqueued > self.queue_timeout:
+                future.set_exception(InferenceDeadlineExceeded("Recognition timed out in queue, retry shortly"))
+                expired += 1
+            else:
+                live.append(item)
+        if expired or cancelled:
+            self.metrics.record_dropped(expired=expired, cancelled=cancelled)
+        return live
+
+    def _loop(self):
+        while True:
+            batch = self._admit(self._collect())
+            if not batch:
+                continue
+            started = time.monotonic()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            try:
+                results = self.run_batch([image for image, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.metrics.record(
+                len(batch), waits, time.monotonic() - started,
+                stages=[getattr(r, "stage", "full") for r in results],
+            )
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            **self.metrics.snapshot(),
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+scheduler = InferenceScheduler(
+    registry.run_batch,
+    max_batch_size=getattr(settings, "INFERENCE_MAX_BATCH_SIZE", 16),
+    max_wait_ms=getattr(settings, "INFERENCE_MAX_WAIT_MS", 10),
+    max_queue_depth=getattr(settings, "INFERENCE_MAX_QUEUE_DEPTH", 64),
+    queue_timeout_ms=getattr(settings, "INFERENCE_QUEUE_TIMEOUT_MS", 2000),
+)
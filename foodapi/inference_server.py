@@ -0,0 +1,241 @@
+"""
+Local inference pool: a fixed number of model processes behind a Unix
+socket, shared by every web worker on the host.
+
+Web workers send decoded images (HWC uint8 BGR arrays, the layout
+ultralytics expects for numpy input) and get back Prediction tuples,
+so torch only ever runs inside the pool.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.connection import Client, Listener
+
+from django.conf import settings
+
+from .images import to_array
+from .inference import InferenceTimeout
+
+
+def _authkey():
+    return settings.SECRET_KEY.encode()
+
+
+def _pool_timeout():
+    return getattr(settings, "INFERENCE_POOL_TIMEOUT", 10)
+
+
+def _worker_main(index, tasks, results, max_batch_size, max_wait_ms, torch_threads):
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+    from PIL import Image
+    from .inference import load_model, predict, predict_batch
+    model = load_model()
+    predict_batch(model, [to_array(Image.new("RGB", (224, 224)))])
+    max_wait = max_wait_ms / 1000
+
+    while True:
+        item = tasks.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = tasks.get(timeout=remaining) if remaining > 0 else tasks.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                tasks.put(None)
+                break
+            batch.append(item)
+
+        ids = [req_id for req_id, _ in batch]
+        # lets the server fail these requests if this process dies mid-batch
+        results.put(("claim", index, ids))
+        try:
+            predictions = predict(model, [image for _, image in batch])
+        except Exception as e:
+            results.put(("done", index, [(req_id, None, str(e)) for req_id in ids]))
+            continue
+        results.put(("done", index, [(req_id, pred, None) for req_id, pred in zip(ids, predictions)]))
+
+
+class InferencePoolServer:
+    """
+    Accepts connections on `socket_path` and fans images out to
+    `workers` model processes through multiprocessing queues.
+
+    A monitor thread respawns worker processes that exit (e.g. OOM-killed)
+    and fails the requests of the batch they were running; every round trip
+    is also bounded by INFERENCE_POOL_TIMEOUT.
+    """
+
+    def __init__(self, socket_path, workers=2, max_batch_size=16, max_wait_ms=10, torch_threads=1):
+        self.socket_path = socket_path
+        self.workers = max(1, int(workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = float(max_wait_ms)
+        self.torch_threads = int(torch_threads)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._processes = []
+        # worker index -> request ids of the batch it is running
+        self._claimed = {}
+        self._stopping = threading.Event()
+
+    def _spawn(self, index):
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._tasks, self._results, self.max_batch_size, self.max_wait_ms, self.torch_threads),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        p.start()
+        return p
+
+    def start_workers(self):
+        self._processes = [self._spawn(i) for i in range(self.workers)]
+        threading.Thread(target=self._dispatch_results, name="inference-results", daemon=True).start()
+        threading.Thread(target=self._monitor, name="inference-monitor", daemon=True).start()
+
+    def stop_workers(self):
+        self._stopping.set()
+        for _ in self._processes:
+            self._tasks.put(None)
+        for p in self._processes:
+            p.join(timeout=5)
+
+    def _monitor(self):
+        while not self._stopping.wait(1):
+            for index, p in enumerate(self._processes):
+                if p.is_alive() or self._stopping.is_set():
+                    continue
+                print(f"[InferencePool] {p.name} exited with code {p.exitcode}, respawning")
+                with self._pending_lock:
+                    ids = self._claimed.pop(index, ())
+                    futures = [self._pending.pop(req_id, None) for req_id in ids]
+                for future in futures:
+                    if future is not None:
+                        future.set_exception(RuntimeError(f"{p.name} died while predicting"))
+                self._processes[index] = self._spawn(index)
+
+    def _submit(self, image):
+        future = Future()
+        req_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[req_id] = future
+        self._tasks.put((req_id, image))
+        return future
+
+    def _dispatch_results(self):
+        while True:
+            kind, index, payload = self._results.get()
+            with self._pending_lock:
+                if kind == "claim":
+                    self._claimed[index] = payload
+                    continue
+                self._claimed.pop(index, None)
+            for req_id, prediction, error in payload:
+                with self._pending_lock:
+                    future = self._pending.pop(req_id, None)
+                if future is None:
+                    continue
+                if error is not None:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result(prediction)
+
+    def _handle(self, conn):
+        try:
+            while True:
+                images = conn.recv()
+                futures = [self._submit(image) for image in images]
+                deadline = time.monotonic() + _pool_timeout()
+                try:
+                    results = [f.result(timeout=max(0, deadline - time.monotonic())) for f in futures]
+                except FutureTimeout:
+                    conn.send({"error": "Inference pool timed out", "timeout": True})
+                except Exception as e:
+                    conn.send({"error": str(e)})
+                else:
+                    conn.send({"results": results})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self.start_workers()
+        listener = Listener(self.socket_path, family="AF_UNIX", authkey=_authkey())
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            self.stop_workers()
+
+
+class InferencePoolClient:
+    """
+    Web-worker side of the pool: one connection per thread, reconnects once
+    if the pool was restarted. A reply slower than INFERENCE_POOL_TIMEOUT
+    (plus a margin for the server's own timeout) drops the connection and
+    raises InferenceTimeout.
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=_authkey())
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def run_batch(self, images):
+        arrays = [to_array(image) for image in images]
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                conn.send(arrays)
+                if not conn.poll(_pool_timeout() + 5):
+                    # a late reply would be read by the next request on this connection
+                    self._reset()
+                    raise InferenceTimeout("Inference pool did not answer in time")
+                reply = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._reset()
+                if attempt == 2:
+                    raise
+        if "error" in reply:
+            raise (InferenceTimeout if reply.get("timeout") else RuntimeError)(reply["error"])
+        return reply["results"]
@@ -0,0 +1,160 @@
+"""
+DailyIntake ledger: atomic per-day increments on EAT, full rebuilds
+from FoodLog, and the trends read over it.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from utils.enums import MACROS
+
+from .models import DailyIntake, FoodLog
+
+
+def add_intake(user_id, day, calories=0, protein=0, carbs=0, fat=0, logs=1):
+    """
+    Increment the (user, day) row in the database (F() expressions, no
+    read-modify-write); the first log of a day inserts it. Concurrent first
+    inserts collide on the unique constraint and fall back to the update.
+    """
+    values = {"calories": calories, "protein": protein, "carbs": carbs, "fat": fat}
+    increments = {field: F(field) + (value or 0) for field, value in values.items()}
+    increments["log_count"] = F("log_count") + logs
+    increments["updated_at"] = timezone.now()
+
+    rows = DailyIntake.objects.filter(user_id=user_id, date=day)
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailyIntake.objects.create(
+                user_id=user_id, date=day, log_count=logs,
+                **{field: value or 0 for field, value in values.items()},
+            )
+    except IntegrityError:
+        rows.update(**increments)
+
+
+def record_log(log):
+    """
+    Add one FoodLog to its user's local day
+    """
+    add_intake(
+        log.user_id,
+        timezone.localdate(log.created_at),
+        **{macro: getattr(log, macro) for macro in MACROS},
+    )
+
+
+def rebuild_daily_intake(user_ids=None, batch_size=5000):
+    """
+    Recompute DailyIntake from FoodLog (grouped by local date) for the given
+    users, or everyone. -> number of rows written
+    """
+    logs = FoodLog.objects.all()
+    intakes = DailyIntake.objects.all()
+    if user_ids is not None:
+        logs = logs.filter(user_id__in=user_ids)
+        intakes = intakes.filter(user_id__in=user_ids)
+
+    totals = (
+        logs.annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("user_id", "day")
+        .annotate(log_count=Count("id"), **{macro: Sum(macro) for macro in MACROS})
+        .order_by()
+    )
+
+    with transaction.atomic():
+        intakes.delete()
+        rows = DailyIntake.objects.bulk_create(
+            (
+                DailyIntake(
+                    user_id=row["user_id"],
+                    date=row["day"],
+                    log_count=row["log_count"],
+                    **{macro: row[macro] or 0 for macro in MACROS},
+                )
+                for row in totals.iterator()
+            ),
+            batch_size=batch_size,
+        )
+    return len(rows)
+
+
+def _on_target(calories, daily_goal, tolerance):
+    return bool(daily_goal) and abs(calories - daily_goal) <= daily_goal * tolerance
+
+
+def intake_trends(user_id, days, daily_goal, today=None):
+    """
+    Per-day and per-week (Monday-based) totals for the last `days` local
+    days, read from DailyIntake only (one indexed range query, <= days rows).
+    A logged day is on target within DAILY_GOAL_TOLERANCE of daily_goal.
+    """
+    today = today or timezone.localdate()
+    start = today - datetime.timedelta(days=days - 1)
+    tolerance = getattr(settings, "DAILY_GOAL_TOLERANCE", 0.1)
+
+    rows = {
+        row["date"]: row
+        for row in DailyIntake.objects.filter(
+            user_id=user_id, date__range=(start, today)
+        ).values("date", "log_count", *MACROS)
+    }
+
+    daily = []
+    weeks = {}
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        row = rows.get(day) or {"log_count": 0, **dict.fromkeys(MACROS, 0)}
+        logged = row["log_count"] > 0
+        daily.append({
+            "date": day,
+            **{macro: round(row[macro], 2) for macro in MACROS},
+            "log_count": row["log_count"],
+            "goal_percentage": round(row["calories"] / daily_goal * 100, 2) if daily_goal else None,
+            "on_target": logged and _on_target(row["calories"], daily_goal, tolerance),
+        })
+
+        week_start = day - datetime.timedelta(days=day.weekday())
+        week = weeks.setdefault(week_start, {
+            "week_start": week_start, "days": 0, "days_logged": 0, "days_on_target": 0,
+            **dict.fromkeys(MACROS, 0.0),
+        })
+        week["days"] += 1
+        week["days_logged"] += logged
+        week["days_on_target"] += daily[-1]["on_target"]
+        for macro in MACROS:
+            week[macro] += row[macro]
+
+    weekly = []
+    for week in weeks.values():
+        for macro in MACROS:
+            week[macro] = round(week[macro], 2)
+        week["avg_calories"] = round(week["calories"] / week["days_logged"], 2) if week["days_logged"] else 0
+        week["goal"] = daily_goal * week["days"] if daily_goal else None
+        weekly.append(week)
+
+    days_logged = sum(1 for d in daily if d["log_count"])
+    days_on_target = sum(1 for d in daily if d["on_target"])
+    total_calories = sum(d["calories"] for d in daily)
+    return {
+        "start_date": start,
+        "end_date": today,
+        "daily": daily,
+        "weekly": weekly,
+        "summary": {
+            "days_logged": days_logged,
+            "days_on_target": days_on_target,
+            "adherence_percentage": round(days_on_target / days_logged * 100, 2) if days_logged else 0,
+            "avg_calories": round(total_calories / days_logged, 2) if days_logged else 0,
+            **{
+                f"total_{macro}": round(sum(d[macro] for d in daily), 2)
+                for macro in MACROS
+            },
+        },
+    }
@@ -0,0 +1,140 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodapi.images import IMAGE_EXTENSIONS, decode_for_model
+from foodapi.inference import BACKEND_PATHS, load_model, model_path, predict_batch, predict_cascade
+
+
+def load_fixtures(directory):
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+    )
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(decode_for_model(f))
+    return paths, images
+
+
+def time_backend(predict_fn, images, warmup=2):
+    """
+    predict_fn(images) -> predictions; -> (predictions, per-image latencies in ms)
+    """
+    for image in images[:warmup]:
+        predict_fn([image])
+
+    predictions, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        predictions.extend(predict_fn([image]))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return predictions, latencies
+
+
+def weights_size_mb(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path)
+            for name in names
+        ) / 1e6
+    return os.path.getsize(path) / 1e6
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.mean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare inference backends on a fixture image directory: top-1 agreement "
+        "with the PyTorch model, weights size and per-image latency. With "
+        "--cascade-imgsz also compares the confidence-gated cascade against "
+        "always running at full resolution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("images", help="Directory of fixture images")
+        parser.add_argument("--backends", default="torch,onnx,onnx_int8,openvino")
+        parser.add_argument("--cascade-imgsz", type=int, default=0)
+        parser.add_argument("--cascade-threshold", type=float, default=0.85)
+        parser.add_argument(
+            "--check-parity", action="store_true",
+            help="Exit with an error if any backend disagrees with torch on a top-1 label",
+        )
+
+    def handle(self, *args, **options):
+        paths, images = load_fixtures(options["images"])
+        if not images:
+            raise CommandError(f"No images found in {options['images']}")
+
+        backends = [b.strip() for b in options["backends"].split(",") if b.strip()]
+        if "torch" not in backends:
+            backends.insert(0, "torch")
+        unknown = [b for b in backends if b not in BACKEND_PATHS]
+        if unknown:
+            raise CommandError(f"Unknown backend(s): {', '.join(unknown)}")
+
+        reference = None
+        mismatched = []
+        self.stdout.write(f"{len(images)} images\n")
+        self.stdout.write(
+            f"{'backend':<18} {'agree':>8} {'size MB':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'low %':>7}"
+        )
+
+        def report(name, predictions, latencies, expected, size):
+            labels = [p.label for p in predictions]
+            agreement = sum(a == b for a, b in zip(labels, expected)) / len(labels)
+            low = sum(p.stage == "low" for p in predictions) / len(predictions)
+            lat = latency_summary(latencies)
+            self.stdout.write(
+                f"{name:<18} {agreement:>8.2%} {size:>8.1f} "
+                f"{lat['mean']:>9.2f} {lat['p50']:>8.2f} {lat['p95']:>8.2f} {low:>7.1%}"
+            )
+            return labels
+
+        for backend in backends:
+            if not os.path.exists(model_path(backend)):
+                self.stdout.write(f"{backend:<18} skipped ({model_path(backend)} not found)")
+                continue
+
+            model = load_model(backend)
+            size = weights_size_mb(model_path(backend))
+            predictions, latencies = time_backend(lambda batch: predict_batch(model, batch), images)
+            full_labels = [p.label for p in predictions]
+            if reference is None:
+                reference = full_labels
+            report(backend, predictions, latencies, reference, size)
+
+            disagree = [p for p, a, b in zip(paths, full_labels, reference) if a != b]
+            if disagree:
+                mismatched.append((backend, disagree))
+
+            if options["cascade_imgsz"]:
+                # agreement measured against this backend at full resolution
+                predictions, latencies = time_backend(
+                    lambda batch: predict_cascade(
+                        model, batch, options["cascade_imgsz"], options["cascade_threshold"]
+                    ),
+                    images,
+                )
+                report(f"{backend}+cascade", predictions, latencies, full_labels, size)
+
+        for backend, disagree in mismatched:
+            self.stdout.write(self.style.WARNING(f"{backend} top-1 differs from torch on:"))
+            for path in disagree:
+                self.stdout.write(f"  {path}")
+
+        if options["check_parity"] and mismatched:
+            raise CommandError("Top-1 parity check failed")
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodapi.inference import MODEL_PATH, load_model
+
+
+class Command(BaseCommand):
+    help = "Export models/best.pt for the CPU inference backends (ONNX Runtime / OpenVINO)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+        parser.add_argument("--imgsz", type=int, default=getattr(settings, "INFERENCE_IMGSZ", 224))
+        parser.add_argument(
+            "--static", action="store_true",
+            help="Fixed 1x3ximgszximgsz input; the default dynamic shape is what "
+                 "lets the scheduler send batches",
+        )
+
+    def handle(self, *args, **options):
+        model = load_model("torch")
+        path = model.export(
+            format=options["format"],
+            imgsz=options["imgsz"],
+            dynamic=not options["static"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {MODEL_PATH} -> {path}. Serve it with INFERENCE_BACKEND={options['format']}"
+        ))
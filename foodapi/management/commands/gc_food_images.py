@@ -0,0 +1,148 @@
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from foodapi.images import UPLOAD_DIR, master_path
+from foodapi.models import FoodLog
+
+
+def _walk_filesystem(storage, directory):
+    """
+    os.scandir-based listing: yields (name, modified timestamp) one entry at a time
+    """
+    root = storage.path("")
+    stack = [storage.path(directory)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    yield name, entry.stat().st_mtime
+
+
+def _walk_storage(storage, directory):
+    """
+    Generic Storage fallback (one listdir per directory)
+    """
+    dirs, files = storage.listdir(directory)
+    for name in files:
+        path = f"{directory}/{name}"
+        yield path, storage.get_modified_time(path).timestamp()
+    for name in dirs:
+        yield from _walk_storage(storage, f"{directory}/{name}")
+
+
+def _owner(name):
+    """
+    The FoodLog.image value that keeps `name` alive: a thumbnail belongs to
+    its master, everything else to itself.
+    """
+    parts = name.split("/")
+    if len(parts) >= 3 and parts[1] == "thumbs":
+        digest = os.path.splitext(parts[-1])[0]
+        return master_path(digest)
+    return name
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete (or archive) files under MEDIA_ROOT/food_detection that no FoodLog "
+        "references and that are older than the grace period"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--archive-dir", help="Move orphans here instead of deleting them")
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Allow a grace period shorter than the recognition cache/session TTL",
+        )
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options["grace_hours"])
+        # cached predictions / sessions hand out image paths until they expire
+        ttl = max(
+            getattr(settings, "RECOGNITION_CACHE_TTL", 0),
+            getattr(settings, "RECOGNITION_SESSION_TTL", 0),
+        )
+        if grace.total_seconds() < ttl and not options["force"]:
+            raise CommandError(
+                f"--grace-hours must cover the recognition cache/session TTL ({ttl}s); use --force to override"
+            )
+
+        storage = default_storage
+        if isinstance(storage, FileSystemStorage):
+            listing = _walk_filesystem(storage, UPLOAD_DIR)
+        else:
+            listing = _walk_storage(storage, UPLOAD_DIR)
+
+        cutoff = (timezone.now() - grace).timestamp()
+        scanned = orphaned = freed = 0
+        batch = []
+
+        for name, mtime in listing:
+            scanned += 1
+            if mtime < cutoff:
+                batch.append(name)
+            if len(batch) >= options["batch_size"]:
+                count, size = self._collect(storage, batch, options)
+                orphaned += count
+                freed += size
+                batch = []
+                self.stdout.write(f"{scanned} scanned, {orphaned} orphaned...")
+        if batch:
+            count, size = self._collect(storage, batch, options)
+            orphaned += count
+            freed += size
+
+        action = "would remove" if options["dry_run"] else ("archived" if options["archive_dir"] else "deleted")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Scanned {scanned} files, {action} {orphaned} ({freed / 1e6:.1f} MB)"
+        ))
+
+    def _collect(self, storage, names, options):
+        """
+        One set-based query per batch -> (orphans handled, bytes)
+        """
+        owners = {name: _owner(name) for name in names}
+        referenced = set(
+            FoodLog.objects.filter(image__in=set(owners.values())).values_list("image", flat=True).distinct()
+        )
+        orphans = [name for name, owner in owners.items() if owner not in referenced]
+
+        size = 0
+        for name in orphans:
+            try:
+                size += storage.size(name)
+                if options["dry_run"]:
+                    continue
+                if options["archive_dir"]:
+                    self._archive(storage, name, options["archive_dir"])
+                else:
+                    storage.delete(name)
+            except FileNotFoundError:
+                continue
+        return len(orphans), size
+
+    def _archive(self, storage, name, archive_dir):
+        target = os.path.join(archive_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if isinstance(storage, FileSystemStorage):
+            shutil.move(storage.path(name), target)
+            return
+        with storage.open(name, "rb") as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        storage.delete(name)
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodapi.catalog_import import FORMATS, read_rows, upsert_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV / NDJSON food catalog (name, portion_type, is_active, "
+        "FoodNutrition columns) and upsert FoodItem + FoodNutrition in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='CSV or NDJSON file, "-" for stdin')
+        parser.add_argument(
+            "--format", choices=FORMATS,
+            help="Default: from the file extension (.ndjson/.jsonl, else csv)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-errors", type=int, default=100,
+            help="Stop printing invalid rows after this many",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        started = time.monotonic()
+        errors = 0
+
+        def on_error(line_no, error):
+            nonlocal errors
+            if errors < options["max_errors"]:
+                self.stderr.write(f"line {line_no}: {error}")
+            errors += 1
+
+        def on_batch(stats):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{stats['items']} upserted ({stats['rows'] / elapsed:.0f} rows/s)...")
+
+        try:
+            rows = read_rows(options["path"], options["format"])
+            stats = upsert_catalog(rows, options["batch_size"], on_error=on_error, on_batch=on_batch)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Rows: {stats['rows']}, FoodItem upserted: {stats['items']}, "
+            f"FoodNutrition upserted: {stats['nutrition']}, invalid: {stats['errors']} "
+            f"in {elapsed:.1f}s ({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
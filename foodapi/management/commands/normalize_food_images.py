@@ -0,0 +1,53 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from foodapi.images import chunks, decode_master, is_normalized, store_normalized, upload_digest
+from foodapi.models import FoodLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill: re-encode FoodLog images as normalized masters + thumbnails "
+        "and point the logs at them. Originals are left for gc_food_images."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        converted = skipped = failed = 0
+
+        logs = FoodLog.objects.exclude(image="").order_by("id").values_list("id", "image")
+        for chunk in chunks(logs.iterator(chunk_size=2000), options["batch_size"]):
+            updates = []
+            for log_id, name in chunk:
+                if is_normalized(name):
+                    skipped += 1
+                    continue
+                if options["dry_run"]:
+                    converted += 1
+                    continue
+                try:
+                    new_name = self._convert(name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"FoodLog {log_id} ({name}): {e}")
+                    continue
+                updates.append(FoodLog(id=log_id, image=new_name))
+
+            if updates:
+                FoodLog.objects.bulk_update(updates, ["image"])
+                converted += len(updates)
+                self.stdout.write(f"{converted} converted...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done{' (dry run)' if options['dry_run'] else ''}. "
+            f"Converted: {converted}, already normalized: {skipped}, failed: {failed}"
+        ))
+
+    def _convert(self, name):
+        with default_storage.open(name, "rb") as f:
+            digest = upload_digest(File(f))
+            return store_normalized(decode_master(f), digest)
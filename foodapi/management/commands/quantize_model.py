@@ -0,0 +1,99 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from foodapi.images import IMAGE_EXTENSIONS
+from foodapi.inference import BACKEND_PATHS
+
+
+def classify_tensor(path, imgsz):
+    """
+    Same preprocessing as ultralytics' classify transforms:
+    resize short side -> center crop -> RGB float CHW in [0, 1]
+    """
+    import numpy as np
+
+    image = Image.open(path)
+    image.draft("RGB", (imgsz, imgsz))
+    image = image.convert("RGB")
+
+    scale = imgsz / min(image.size)
+    image = image.resize(
+        (max(imgsz, round(image.width * scale)), max(imgsz, round(image.height * scale))),
+        Image.BILINEAR,
+    )
+    left = (image.width - imgsz) // 2
+    top = (image.height - imgsz) // 2
+    image = image.crop((left, top, left + imgsz, top + imgsz))
+
+    array = np.asarray(image, dtype=np.float32) / 255.0
+    return array.transpose(2, 0, 1)[None]
+
+
+class ImageCalibrationReader:
+    """
+    onnxruntime CalibrationDataReader over a directory of sample images
+    """
+
+    def __init__(self, paths, input_name, imgsz):
+        self._batches = ({input_name: classify_tensor(p, imgsz)} for p in paths)
+
+    def get_next(self):
+        return next(self._batches, None)
+
+
+class Command(BaseCommand):
+    help = "Build the INT8 post-training-quantized classifier (models/best.int8.onnx)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("calibration_dir", help="Directory of representative food photos")
+        parser.add_argument("--limit", type=int, default=300, help="Max calibration images")
+        parser.add_argument("--imgsz", type=int, default=getattr(settings, "INFERENCE_IMGSZ", 224))
+
+    def handle(self, *args, **options):
+        import onnx
+        import onnxruntime
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+        source = BACKEND_PATHS["onnx"]
+        target = BACKEND_PATHS["onnx_int8"]
+        if not os.path.exists(source):
+            raise CommandError(f"{source} not found, run `python manage.py export_model --format onnx` first")
+
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(options["calibration_dir"])
+            for name in names
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+        )[:options["limit"]]
+        if not paths:
+            raise CommandError(f"No images found in {options['calibration_dir']}")
+
+        input_name = onnxruntime.InferenceSession(
+            source, providers=["CPUExecutionProvider"]
+        ).get_inputs()[0].name
+
+        self.stdout.write(f"Calibrating on {len(paths)} images...")
+        quantize_static(
+            source,
+            target,
+            ImageCalibrationReader(paths, input_name, options["imgsz"]),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+
+        # keep ultralytics' metadata (class names, imgsz, task) so YOLO() can load it
+        quantized = onnx.load(target)
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(onnx.load(source).metadata_props)
+        onnx.save(quantized, target)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {target} ({os.path.getsize(target) / 1e6:.1f} MB). "
+            f"Compare with `python manage.py benchmark_model <images> --backends torch,onnx_int8`, "
+            f"serve with INFERENCE_BACKEND=onnx_int8"
+        ))
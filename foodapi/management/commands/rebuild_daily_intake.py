@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from foodapi.intake import rebuild_daily_intake
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyIntake ledger from FoodLog (backfill / repair)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="users",
+            help="Only this user id (repeatable). Default: all users.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_intake(options["users"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Done. DailyIntake rows written: {written}"))
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from foodapi.intake import rebuild_daily_intake
+from foodapi.models import FoodLog, FoodNutrition
+from utils.enums import MACROS, NUTRITION_FIELDS
+from utils.nutrition_table import NutritionTable, encode_sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute calories/protein/carbs/fat of FoodLogs from the current "
+        "FoodNutrition values (vectorised), e.g. after correcting nutrition data, "
+        "and rebuild DailyIntake for the affected users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--food", action="append", default=[],
+            help="Only logs of this food (repeatable). Default: all logs.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        foods = [name.strip().lower() for name in options["food"]]
+
+        nutrition = FoodNutrition.objects.all()
+        if foods:
+            nutrition = nutrition.filter(food__name__in=foods)
+        table = NutritionTable.from_rows(
+            nutrition.values_list("food_id", "food__portion_type", *NUTRITION_FIELDS)
+        )
+        self.stdout.write(f"Nutrition table: {len(table)} foods")
+
+        logs = FoodLog.objects.order_by("id")
+        if foods:
+            logs = logs.filter(food_item__name__in=foods)
+        rows = logs.values_list("id", "food_item_id", "pieces", "size", "user_id", *MACROS)
+
+        batch_size = options["batch_size"]
+        scanned = changed = skipped = 0
+        started = time.monotonic()
+        last_id = 0
+        users = set()
+
+        while True:
+            # keyset pagination: each batch is one indexed range query
+            chunk = list(rows.filter(id__gt=last_id)[:batch_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            scanned += len(chunk)
+
+            ids, food_ids, pieces, sizes, user_ids, *current = zip(*chunk)
+            computed = table.compute(food_ids, np.array(pieces, dtype=np.float64), encode_sizes(sizes))
+            current = np.array(list(zip(*current)), dtype=np.float64)
+
+            valid = ~np.isnan(computed).any(axis=1)
+            differs = ~np.isclose(computed, current, equal_nan=False).all(axis=1)
+            skipped += int((~valid).sum())
+
+            selected = np.flatnonzero(valid & differs)
+            if not len(selected):
+                continue
+            changed += len(selected)
+            if options["dry_run"]:
+                continue
+
+            users.update(user_ids[i] for i in selected.tolist())
+            values = computed[selected].tolist()
+            FoodLog.objects.bulk_update(
+                [FoodLog(id=ids[i], **dict(zip(MACROS, v))) for i, v in zip(selected.tolist(), values)],
+                list(MACROS),
+            )
+            self.stdout.write(f"{scanned} scanned, {changed} updated...")
+
+        if users:
+            # DailyIntake totals are sums of the logs just changed
+            rebuilt = rebuild_daily_intake(sorted(users))
+            self.stdout.write(f"DailyIntake rebuilt for {len(users)} users ({rebuilt} days)")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done{' (dry run)' if options['dry_run'] else ''}. "
+            f"Scanned: {scanned}, updated: {changed}, skipped (no nutrition / pieces / size): {skipped} "
+            f"in {elapsed:.1f}s ({scanned / elapsed if elapsed else 0:.0f} logs/s)"
+        ))
@@ -0,0 +1,171 @@
+import json
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from foodapi.images import IMAGE_EXTENSIONS, UPLOAD_DIR, chunks, decode_for_model
+from foodapi.inference import load_model, model_path, predict_batch, weights_version
+from foodapi.models import FoodLog
+
+
+def _decode(item):
+    """
+    Runs in the decode pool: (key, log_id, path, from_storage) -> (key, log_id, array | None, error)
+    """
+    key, log_id, path, from_storage = item
+    try:
+        opener = default_storage.open if from_storage else open
+        with opener(path, "rb") as f:
+            return key, log_id, decode_for_model(f), None
+    except Exception as e:
+        return key, log_id, None, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score stored food images with the current model: decode in parallel "
+        "processes, predict in batches, write JSONL and/or update FoodLog in bulk"
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument(
+            "--dir",
+            help=f"Image directory (default: MEDIA_ROOT/{UPLOAD_DIR})",
+        )
+        source.add_argument(
+            "--food-logs", action="store_true",
+            help="Re-score the images attached to FoodLog rows",
+        )
+        parser.add_argument("--output", help="Append results to this JSONL file")
+        parser.add_argument(
+            "--update-db", action="store_true",
+            help="With --food-logs: bulk update predicted_label/confidence/model_version",
+        )
+        parser.add_argument("--backend", default=None, help="Defaults to INFERENCE_BACKEND")
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+
+    def handle(self, *args, **options):
+        if not options["output"] and not options["update_db"]:
+            raise CommandError("Nothing to do: pass --output and/or --update-db")
+        if options["update_db"] and not options["food_logs"]:
+            raise CommandError("--update-db needs --food-logs")
+
+        version = weights_version(model_path(options["backend"]))
+
+        # Resume: skip what a previous run already wrote for this model version
+        done = set()
+        if options["output"] and os.path.exists(options["output"]):
+            with open(options["output"]) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # half-written last line of an interrupted run
+                    if record.get("model_version") == version:
+                        done.add(record["key"])
+
+        items = self._items(options, version, done)
+
+        # Fork the decoders before torch is loaded so they stay small
+        pool = multiprocessing.Pool(options["workers"])
+        model = load_model(options["backend"])
+        output = open(options["output"], "a") if options["output"] else None
+
+        started = time.monotonic()
+        processed = failed = 0
+        try:
+            # The queryset is iterated here (DB connections are per thread);
+            # the pool decodes the next batch while this one is predicted.
+            batches = chunks(items, options["batch_size"])
+            batch = next(batches, None)
+            pending = pool.map_async(_decode, batch) if batch else None
+            while pending is not None:
+                chunk = pending.get()
+                batch = next(batches, None)
+                pending = pool.map_async(_decode, batch) if batch else None
+
+                ok = [(key, log_id, image) for key, log_id, image, error in chunk if error is None]
+                for key, _, _, error in chunk:
+                    if error is not None:
+                        failed += 1
+                        self.stderr.write(f"skip {key}: {error}")
+                if not ok:
+                    continue
+
+                predictions = predict_batch(model, [image for _, _, image in ok])
+                rows = list(zip(ok, predictions))
+
+                if output:
+                    for (key, log_id, _), p in rows:
+                        output.write(json.dumps({
+                            "key": key,
+                            "food_log_id": log_id,
+                            "food": p.label,
+                            "confidence": round(p.confidence, 4),
+                            "top": [[label, round(conf, 4)] for label, conf in p.top],
+                            "model_version": version,
+                        }) + "\n")
+                    output.flush()
+
+                if options["update_db"]:
+                    FoodLog.objects.bulk_update(
+                        [
+                            FoodLog(
+                                id=log_id,
+                                predicted_label=p.label,
+                                predicted_confidence=p.confidence,
+                                model_version=version,
+                            )
+                            for (_, log_id, _), p in rows
+                        ],
+                        ["predicted_label", "predicted_confidence", "model_version"],
+                    )
+
+                processed += len(rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{processed} images, {processed / elapsed:.1f} img/s")
+        finally:
+            pool.close()
+            pool.join()
+            if output:
+                output.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {processed} re-scored with model {version}, {failed} failed, "
+            f"{len(done)} already done, {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.1f} img/s)"
+        ))
+
+    def _items(self, options, version, done):
+        """
+        Lazily yields (key, log_id, path, from_storage) so millions of rows never sit in memory
+        """
+        if options["food_logs"]:
+            logs = FoodLog.objects.exclude(image="")
+            if options["update_db"]:
+                # rows re-scored by this model in an interrupted run are skipped
+                logs = logs.exclude(model_version=version)
+            for log_id, name in logs.order_by("id").values_list("id", "image").iterator(chunk_size=2000):
+                key = f"food_log:{log_id}"
+                if key not in done:
+                    yield key, log_id, name, True
+            return
+
+        directory = options["dir"] or os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+        for root, dirs, names in os.walk(directory):
+            if root == directory:
+                # thumbs/<size>/... are derived from the masters next to them
+                dirs[:] = [d for d in dirs if d != "thumbs"]
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, directory)
+                if key not in done:
+                    yield key, None, path, False
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from foodapi.inference_server import InferencePoolServer
+
+
+class Command(BaseCommand):
+    help = "Run the shared food recognition worker pool on a local Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=getattr(settings, "INFERENCE_POOL_SOCKET", ""))
+        parser.add_argument("--workers", type=int, default=getattr(settings, "INFERENCE_POOL_WORKERS", 2))
+        parser.add_argument("--threads", type=int, default=getattr(settings, "INFERENCE_POOL_TORCH_THREADS", 1))
+
+    def handle(self, *args, **options):
+        socket_path = options["socket"]
+        if not socket_path:
+            raise CommandError("Set INFERENCE_POOL_SOCKET or pass --socket")
+
+        server = InferencePoolServer(
+            socket_path,
+            workers=options["workers"],
+            max_batch_size=getattr(settings, "INFERENCE_MAX_BATCH_SIZE", 16),
+            max_wait_ms=getattr(settings, "INFERENCE_MAX_WAIT_MS", 10),
+            torch_threads=options["threads"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Inference pool: {options['workers']} workers x {options['threads']} threads on {socket_path}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
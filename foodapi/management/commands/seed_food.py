@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from foodapi.models import FoodItem, FoodNutrition, PortionType  # change app name if needed
+from foodapi.catalog_import import upsert_catalog
+from foodapi.models import PortionType  # change app name if needed
 
 
 FOODS = [
@@ -150,54 +150,36 @@ def get_default_nutrition(portion_type: str):
     }
 
 
-class Command(BaseCommand):
-    help = "Seed FoodItem and FoodNutrition with starter data"
-
-    @transaction.atomic
-    def handle(self, *args, **options):
-        created_items = 0
-        created_nutrition = 0
-        updated_nutrition = 0
-
-        for name, ptype in FOODS:
-            name = name.strip().lower()
+def seed_rows():
+    """
+    FOODS + NUTRITION as flat catalog rows for upsert_catalog()
+    """
+    for line_no, (name, ptype) in enumerate(FOODS, 1):
+        payload = NUTRITION.get(name) or get_default_nutrition(ptype)
+        row = {"name": name, "portion_type": ptype}
 
-            food, created = FoodItem.objects.get_or_create(
-                name=name,
-                defaults={"portion_type": ptype, "is_active": True},
-            )
-            if created:
-                created_items += 1
-            else:
-                # keep portion_type synced (optional)
-                if food.portion_type != ptype:
-                    food.portion_type = ptype
-                    food.save(update_fields=["portion_type"])
+        if ptype == PortionType.COUNTABLE:
+            per = payload.get("per_piece") or get_default_nutrition(PortionType.COUNTABLE)["per_piece"]
+            for macro, value in per.items():
+                row[f"{macro}_per_piece"] = value
+        else:
+            por = payload.get("portion") or get_default_nutrition(PortionType.PORTION)["portion"]
+            for size in ("small", "medium", "large"):
+                for macro, value in por[size].items():
+                    row[f"{macro}_{size}"] = value
 
-            payload = NUTRITION.get(name) or get_default_nutrition(ptype)
+        yield line_no, row
 
-            nutrition, n_created = FoodNutrition.objects.get_or_create(food=food)
-            if n_created:
-                created_nutrition += 1
 
-            if food.portion_type == PortionType.COUNTABLE:
-                per = payload.get("per_piece") or get_default_nutrition(PortionType.COUNTABLE)["per_piece"]
-                nutrition.calories_per_piece = per["calories"]
-                nutrition.protein_per_piece = per["protein"]
-                nutrition.carbs_per_piece = per["carbs"]
-                nutrition.fat_per_piece = per["fat"]
+class Command(BaseCommand):
+    help = "Seed FoodItem and FoodNutrition with starter data"
 
-            else:
-                por = payload.get("portion") or get_default_nutrition(PortionType.PORTION)["portion"]
-                for size in ("small", "medium", "large"):
-                    nutrition.__dict__[f"calories_{size}"] = por[size]["calories"]
-                    nutrition.__dict__[f"protein_{size}"] = por[size]["protein"]
-                    nutrition.__dict__[f"carbs_{size}"] = por[size]["carbs"]
-                    nutrition.__dict__[f"fat_{size}"] = por[size]["fat"]
+    def handle(self, *args, **options):
+        def on_error(line_no, error):
+            self.stderr.write(f"{FOODS[line_no - 1][0]}: {error}")
 
-            nutrition.save()
-            updated_nutrition += 1
+        stats = upsert_catalog(seed_rows(), batch_size=len(FOODS), on_error=on_error)
 
         self.stdout.write(self.style.SUCCESS(
-            f"Done. FoodItem created: {created_items}, FoodNutrition created: {created_nutrition}, updated: {updated_nutrition}"
+            f"Done. FoodItem upserted: {stats['items']}, FoodNutrition upserted: {stats['nutrition']}"
         ))
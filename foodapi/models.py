@@ -59,7 +59,8 @@ class FoodNutrition(models.Model):
 
 class FoodLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="food_logs")
-    image = models.ImageField(upload_to="food_detection/")
+    # indexed: gc_food_images looks up referenced files in batches
+    image = models.ImageField(upload_to="food_detection/", db_index=True)
 
     food_item = models.ForeignKey(
         FoodItem,
@@ -77,9 +78,41 @@ class FoodLog(models.Model):
     carbs = models.FloatField(null=True, blank=True)
     fat = models.FloatField(null=True, blank=True)
 
+    # Latest offline re-score of `image` (python manage.py relabel_images)
+    predicted_label = models.CharField(max_length=120, blank=True, default="")
+    predicted_confidence = models.FloatField(null=True, blank=True)
+    model_version = models.CharField(max_length=32, blank=True, default="", db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)    
     class Meta:
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"{self.food_item.name} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class DailyIntake(models.Model):
+    """
+    Per-user, per-local-day totals of FoodLog macros, maintained on EAT
+    (foodapi/intake.py) and rebuilt with `python manage.py rebuild_daily_intake`
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_intakes")
+    date = models.DateField()
+
+    calories = models.FloatField(default=0)
+    protein = models.FloatField(default=0)
+    carbs = models.FloatField(default=0)
+    fat = models.FloatField(default=0)
+    log_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            # also the (user, date) lookup index
+            models.UniqueConstraint(fields=["user", "date"], name="unique_daily_intake"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} @ {self.date}: {self.calories:.0f} kcal"
@@ -0,0 +1,167 @@
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+from .images import check_upload_size, decode_for_model, master_path, store_normalized_async, upload_digest
+from .inference import InferenceTimeout, registry, scheduler
+from .catalog import get_catalog
+
+# Bounded LRU + TTL, see CACHES["recognition"] in settings
+recognition_cache = caches["recognition"]
+
+
+def _cache_key(digest):
+    return f"prediction:{registry.model_version()}:{digest}"
+
+
+def get_cached_prediction(digest):
+    """
+    -> {"food", "confidence", "top", "stage", "food_item_id", "portion_type",
+        "image_path", "model_version"} or None
+    """
+    return recognition_cache.get(_cache_key(digest))
+
+
+def cache_prediction(digest, food, confidence, top, food_item_id, portion_type, image_path,
+                     stage="full", stored=None):
+    """
+    -> the prediction entry. It is cached right away, or with `stored` (the
+    Future of the image write) only once that write has succeeded: a failed
+    write must not turn every retry of the photo into a hit on a missing file.
+    """
+    result = {
+        "food": food,
+        "confidence": confidence,
+        "top": top,
+        "stage": stage,
+        "food_item_id": food_item_id,
+        "portion_type": portion_type,
+        "image_path": image_path,
+        "model_version": registry.model_version(),
+    }
+    key = _cache_key(digest)
+    if stored is None:
+        recognition_cache.set(key, result)
+    else:
+        stored.add_done_callback(
+            lambda f: f.cancelled() or f.exception() is not None or recognition_cache.set(key, result)
+        )
+    return result
+
+
+# ---------- recognition sessions ----------
+
+SESSION_FIELDS = ("food", "confidence", "food_item_id", "portion_type", "image_path", "model_version")
+SESSION_SALT = "foodapi.recognition"
+
+
+def open_session(result):
+    """
+    Hand what was recognised to the client as a signed, time-stamped token
+    (recognition_id), so eat-food can build the log on any web worker
+    without re-resolving the food or touching storage.
+    """
+    recognition_id = signing.dumps(
+        {k: result[k] for k in SESSION_FIELDS}, salt=SESSION_SALT, compress=True
+    )
+    result["recognition_id"] = recognition_id
+    return recognition_id
+
+
+def get_session(recognition_id):
+    """
+    -> {"food", "confidence", "food_item_id", "portion_type", "image_path", "model_version"}
+       or None if tampered with / older than RECOGNITION_SESSION_TTL
+    """
+    try:
+        return signing.loads(
+            recognition_id,
+            salt=SESSION_SALT,
+            max_age=getattr(settings, "RECOGNITION_SESSION_TTL", 15 * 60),
+        )
+    except signing.BadSignature:
+        return None
+
+
+def prepare_upload(image_file):
+    """
+    Check + hash one upload. Cache hit -> (result, None); otherwise the
+    image is decoded near INFERENCE_IMGSZ -> (result, model-ready array),
+    and its normalized master + thumbnails are decoded, encoded and stored
+    in the background.
+
+    The upload is never read into one bytes object: the hash comes from the
+    upload handlers and decoding reads the file.
+    Raises ImageRejected for oversized files / pixel counts.
+    """
+    check_upload_size(image_file)
+    digest = upload_digest(image_file)
+
+    # Same photo seen before (client retry / re-upload) -> no write, no model
+    cached = get_cached_prediction(digest)
+    if cached:
+        return {**cached, "digest": digest, "cached": True}, None
+
+    # Request path only decodes near the model input size (JPEG draft)
+    image = decode_for_model(image_file)
+
+    # Master decode + resize, thumbnails and the write run in the background
+    # (once per distinct content) from a copy of the upload
+    stored = store_normalized_async(image_file, digest)
+
+    return {"digest": digest, "cached": False, "image_path": master_path(digest), "stored": stored}, image
+
+
+def finish_predictions(pending, predictions):
+    """
+    Attach predictions to their results: ids / portion types come from the
+    in-memory catalog, then cache each one once its image is stored.
+    """
+    catalog = get_catalog()
+
+    for result, p in zip(pending, predictions):
+        entry = catalog.get(p.label)
+        food_item_id, portion_type = (entry.id, entry.portion_type) if entry else (None, None)
+        result.update(cache_prediction(
+            result["digest"], p.label, p.confidence, p.top,
+            food_item_id, portion_type, result["image_path"], stage=p.stage,
+            stored=result.pop("stored", None),
+        ))
+
+
+def wait_predictions(futures):
+    """
+    Results of scheduler futures, bounded by INFERENCE_RESULT_TIMEOUT in total;
+    on timeout the unfinished ones are cancelled and InferenceTimeout raised.
+    """
+    deadline = time.monotonic() + getattr(settings, "INFERENCE_RESULT_TIMEOUT", 30)
+    try:
+        return [f.result(timeout=max(0, deadline - time.monotonic())) for f in futures]
+    except FutureTimeout:
+        for f in futures:
+            f.cancel()
+        raise InferenceTimeout("Recognition timed out, try again")
+
+
+def recognize_uploads(files):
+    """
+    Recognise uploaded images; cache misses go to the scheduler together so
+    they share one predict, and portion types come from the food catalog.
+
+    -> [{"recognition_id", "digest", "cached", "food", "confidence", "top",
+         "portion_type", "image_path", ...}]
+    """
+    prepared = [prepare_upload(image_file) for image_file in files]
+    pending = [(result, image) for result, image in prepared if image is not None]
+
+    if pending:
+        futures = scheduler.submit_many([image for _, image in pending])
+        finish_predictions([result for result, _ in pending], wait_predictions(futures))
+
+    results = [result for result, _ in prepared]
+    for result in results:
+        open_session(result)
+    return results
@@ -0,0 +1,182 @@
+"""
+In-memory food search over the catalog snapshot: a sorted name list for
+prefix lookups (bisect) plus a trigram inverted index for typo-tolerant
+matches. Rebuilt in a background thread whenever the catalog snapshot
+changes; searches keep using the previous index until the new one is ready.
+"""
+import bisect
+import re
+import threading
+
+import numpy as np
+
+from .catalog import get_catalog
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    return _SPACES.sub(" ", text.strip().lower())
+
+
+def trigrams(text):
+    """
+    pg_trgm-style: each word padded with two leading and one trailing space
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FoodSearchIndex:
+    # Grams found in more than this fraction of names (and in more than
+    # MIN_COMMON_SIZE names), e.g. "  m", "mo", do not generate candidates;
+    # they are only checked against the candidates the rarer grams produced,
+    # so the work per query stays bounded as the catalog grows.
+    COMMON_GRAM_FRACTION = 0.01
+    MIN_COMMON_SIZE = 500
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda e: e.name)
+        self.names = [e.name for e in self.entries]
+        gram_counts = []
+        postings = {}
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        # sorted id arrays: bincount for candidates, searchsorted for membership
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.array(gram_counts, dtype=np.float64)
+        self.name_lengths = np.array([len(name) for name in self.names], dtype=np.int64)
+        self.common_size = max(self.MIN_COMMON_SIZE, int(len(self.names) * self.COMMON_GRAM_FRACTION))
+
+    def _prefix(self, query, limit):
+        """
+        The `limit` shortest names starting with query (alphabetical among
+        equal lengths), over the whole bisect range
+        """
+        start = bisect.bisect_left(self.names, query)
+        end = bisect.bisect_left(self.names, query + "\U0010ffff", lo=start)
+        if end - start <= limit:
+            ids = np.arange(start, end)
+        else:
+            # unique keys: length first, then position (= alphabetical order)
+            keys = self.name_lengths[start:end] * len(self.names) + np.arange(end - start)
+            ids = start + np.argpartition(keys, limit)[:limit]
+        return sorted(ids.tolist(), key=lambda i: (len(self.names[i]), i))
+
+    def _similar(self, query, threshold, limit):
+        """
+        -> up to `limit` [(score, i)] with trigram Jaccard similarity >= threshold
+        """
+        grams = trigrams(query)
+        postings = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not postings:
+            return []
+        n = len(grams)
+
+        rare = [ids for ids in postings if len(ids) <= self.common_size]
+        common = [ids for ids in postings if len(ids) > self.common_size]
+        if not rare:
+            rare, common = postings, []
+
+        counts = np.bincount(np.concatenate(rare), minlength=len(self.names))
+        candidates = np.flatnonzero(counts)
+        # Jaccard >= threshold needs threshold*n <= |name grams| <= n/threshold
+        sizes = self.gram_counts[candidates]
+        keep = (sizes >= threshold * n) & (sizes <= n / threshold)
+        candidates, sizes = candidates[keep], sizes[keep]
+        shared = counts[candidates].astype(np.float64)
+
+        for ids in common:
+            pos = np.minimum(np.searchsorted(ids, candidates), len(ids) - 1)
+            shared += ids[pos] == candidates
+
+        scores = shared / (n + sizes - shared)
+        keep = scores >= threshold
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            candidates, scores = candidates[top], scores[top]
+
+        scored = list(zip(scores.tolist(), candidates.tolist()))
+        scored.sort(key=lambda s: (-s[0], len(self.names[s[1]]), self.names[s[1]]))
+        return scored
+
+    def search(self, query, limit=10, threshold=0.3):
+        """
+        -> [(entry, score)]: exact match, then prefix matches (shortest
+        first), then trigram similarity matches
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        prefix = self._prefix(query, limit)
+        results = [(i, 1.0 if self.names[i] == query else 0.9) for i in prefix]
+
+        if len(results) < limit:
+            seen = set(prefix)
+            for score, i in self._similar(query, threshold, limit + len(prefix)):
+                if i not in seen:
+                    results.append((i, round(min(score, 0.89), 4)))
+                    if len(results) == limit:
+                        break
+
+        return [(self.entries[i], score) for i, score in results]
+
+
+_index = None
+_building = None
+_lock = threading.Lock()
+
+
+def _build(catalog):
+    global _index
+    index = FoodSearchIndex(catalog.by_name.values())
+    with _lock:
+        _index = (catalog, index)
+    return index
+
+
+def _build_in_background(catalog):
+    global _building
+    try:
+        _build(catalog)
+    except Exception as e:
+        print(f"[FoodSearch] Index build failed: {e}")
+    finally:
+        with _lock:
+            if _building is catalog:
+                _building = None
+
+
+def get_index():
+    """
+    Index for the current catalog snapshot. A changed snapshot is indexed in
+    a background thread while the previous index keeps serving; only the
+    very first build runs on the request path.
+    """
+    global _building
+    catalog = get_catalog()
+    with _lock:
+        index = _index
+        if index is not None and index[0] is catalog:
+            return index[1]
+        if index is not None:
+            if _building is not catalog:
+                _building = catalog
+                threading.Thread(
+                    target=_build_in_background, args=(catalog,), name="food-search-index", daemon=True
+                ).start()
+            return index[1]
+    # first build: a failure surfaces to the caller
+    return _build(catalog)
+
+
+def search_foods(query, limit=10):
+    return get_index().search(query, limit)
@@ -1,11 +1,14 @@
 from rest_framework import serializers
-from django.shortcuts import get_object_or_404
-from .models import FoodLog, FoodItem
+from django.http import Http404
+from .models import FoodLog
 from utils.enums import PortionType
 from utils.calculate_nutr import compute_nutrition
 from urllib.parse import urlparse, unquote
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
+from django.conf import settings
+from .images import UPLOAD_DIR, is_normalized, is_stored, thumbnail_path
+from .recognition import get_session
+from .catalog import get_catalog, get_food
 
 class FoodNutritionRequestSerializer(serializers.Serializer):
     food = serializers.CharField(max_length=120)
@@ -24,12 +27,28 @@ class FoodNutritionRequestSerializer(serializers.Serializer):
         return attrs
 
 
+class MealNutritionRequestSerializer(serializers.Serializer):
+    """
+    Items are validated one by one with FoodNutritionRequestSerializer in the
+    view, so a bad item (even a non-object) does not reject the whole meal.
+    """
+    items = serializers.ListField(
+        child=serializers.JSONField(),
+        allow_empty=False,
+        max_length=getattr(settings, "MEAL_MAX_ITEMS", 50),
+    )
+
+
 class FoodLogCreateSerializer(serializers.ModelSerializer):
     """
     Used when user presses EAT
+
+    Either `recognition_id` (from recognize-food) or the legacy
+    `food` + `confidence` + `image_url` triple.
     """
-    food = serializers.CharField(write_only=True)
-    image_url = serializers.URLField(write_only=True)
+    recognition_id = serializers.CharField(write_only=True, required=False)
+    food = serializers.CharField(write_only=True, required=False)
+    image_url = serializers.URLField(write_only=True, required=False)
     pieces = serializers.FloatField(required=False)
     size = serializers.ChoiceField(
         choices=["small", "medium", "large"],
@@ -42,6 +61,7 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "image",
+            "recognition_id",
             "image_url",
             "food",
             "confidence",
@@ -60,17 +80,63 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
             "fat",
             "created_at",
         ]
+        extra_kwargs = {"confidence": {"required": False}}
 
     def validate_food(self, value):
         return value.strip().lower()
 
+    def _from_session(self, attrs):
+        """
+        Fill food_item / confidence / image_path from a recognition session:
+        the stored path is trusted, so no URL parsing, only an existence check.
+        """
+        session = get_session(attrs.pop("recognition_id"))
+        if session is None:
+            return False
+        if session["food_item_id"] is None:
+            raise serializers.ValidationError(
+                {"recognition_id": f"'{session['food']}' is not in the food catalog."}
+            )
+
+        food_item = get_catalog().by_id.get(session["food_item_id"])
+        if food_item is None:
+            raise serializers.ValidationError(
+                {"recognition_id": f"'{session['food']}' is no longer in the food catalog."}
+            )
+
+        # gc_food_images may have removed an unreferenced file since recognition
+        if not is_stored(session["image_path"]):
+            raise serializers.ValidationError(
+                {"recognition_id": "Image not found on server, recognize the image again."}
+            )
+
+        attrs["food_item"] = food_item
+        attrs["confidence"] = session["confidence"]
+        attrs["image_path"] = session["image_path"]
+        attrs.pop("food", None)
+        attrs.pop("image_url", None)
+        return True
+
     def validate(self, attrs):
-        food_name = attrs.get("food")
+        if not (attrs.get("recognition_id") and self._from_session(attrs)):
+            attrs.pop("recognition_id", None)
+            missing = {
+                field: "This field is required."
+                for field in ("food", "confidence", "image_url")
+                if attrs.get(field) is None
+            }
+            if missing:
+                if self.initial_data.get("recognition_id"):
+                    missing = {"recognition_id": "Unknown or expired recognition, recognize the image again."}
+                raise serializers.ValidationError(missing)
+            attrs["food_item"] = get_food(attrs["food"])
+            if attrs["food_item"] is None:
+                raise Http404
+
+        food_item = attrs["food_item"]
         pieces = attrs.get("pieces")
         size = attrs.get("size")
 
-        food_item = get_object_or_404(FoodItem, name=food_name, is_active=True)
-
         if food_item.portion_type == PortionType.COUNTABLE and pieces is None:
             raise serializers.ValidationError(
                 {"pieces": "This food requires number of pieces."}
@@ -81,7 +147,6 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
                 {"size": "This food requires portion size (small/medium/large)."}
             )
 
-        attrs["food_item"] = food_item
         return attrs
 
 
@@ -89,22 +154,24 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
         request = self.context["request"]
 
         food_item = validated_data.pop("food_item")
-        validated_data.pop("food")
-        image_url = validated_data.pop("image_url")
-
-        # 🔹 convert image_url → ImageField
-        parsed = urlparse(image_url)
-        relative_path = parsed.path.replace("/media/", "")
-        relative_path = unquote(relative_path)  # ✅ converts %20 to space
-        if not default_storage.exists(relative_path):
-            raise serializers.ValidationError(
-                {"image_url": "Image not found on server."}
-            )
-
-        with default_storage.open(relative_path, "rb") as f:
-            image_file = ContentFile(f.read(), name=relative_path.split("/")[-1])
+        validated_data.pop("food", None)
+        image_url = validated_data.pop("image_url", None)
+        relative_path = validated_data.pop("image_path", None)
+
+        if relative_path is None:
+            # 🔹 convert image_url → reference to the already stored file (no copy)
+            parsed = urlparse(image_url)
+            relative_path = parsed.path.replace("/media/", "")
+            relative_path = unquote(relative_path)  # ✅ converts %20 to space
+            if (
+                not relative_path.startswith(f"{UPLOAD_DIR}/")
+                or ".." in relative_path.split("/")
+                or not is_stored(relative_path)
+            ):
+                raise serializers.ValidationError(
+                    {"image_url": "Image not found on server."}
+                )
 
-        nutrition = food_item.nutrition
         pieces = validated_data.get("pieces")
         size = validated_data.get("size")
 
@@ -112,8 +179,8 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
 
         validated_data.update({
             "user": request.user,
-            "food_item": food_item,
-            "image": image_file,
+            "food_item_id": food_item.id,
+            "image": relative_path,
             "calories": result["calories"],
             "protein": result["protein"],
             "carbs": result["carbs"],
@@ -124,11 +191,33 @@ class FoodLogCreateSerializer(serializers.ModelSerializer):
 
 # for get api
 class FoodLogSerializer(serializers.ModelSerializer):
+    """
+    Returns a `thumbnail` URL; the full `image` only with ?full=true
+    """
     food = serializers.CharField(source="food_item.name", read_only=True)
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodLog
         fields = [
-            "id", "image", "food", "confidence", "pieces", "size",
+            "id", "image", "thumbnail", "food", "confidence", "pieces", "size",
             "calories", "protein", "carbs", "fat", "created_at"
-        ]
\ No newline at end of file
+        ]
+
+    def get_thumbnail(self, obj):
+        if not obj.image:
+            return None
+        path = obj.image.name
+        if is_normalized(path):
+            # derived name, no storage lookup
+            path = thumbnail_path(path, getattr(settings, "FOOD_LOG_THUMBNAIL_SIZE", 256))
+        url = default_storage.url(path)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        if not (request and request.query_params.get("full") == "true"):
+            data.pop("image")
+        return data
\ No newline at end of file
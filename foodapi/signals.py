@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog
+from .models import FoodItem, FoodNutrition
+
+
+@receiver([post_save, post_delete], sender=FoodItem)
+@receiver([post_save, post_delete], sender=FoodNutrition)
+def invalidate_catalog(sender, **kwargs):
+    # after commit: a reload before that would tag the old rows with the new version
+    transaction.on_commit(catalog.invalidate)
@@ -1,3 +1,100 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import os
+import unittest
 
-# Create your tests here.
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    SimpleUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+
+@override_settings(FILE_UPLOAD_HANDLERS=[
+    "foodapi.uploads.HashingMemoryFileUploadHandler",
+    "foodapi.uploads.HashingTemporaryFileUploadHandler",
+])
+class HashingUploadHandlerTests(SimpleTestCase):
+    def upload(self, data):
+        request = RequestFactory().post("/api/recognize-food/", {
+            "image": SimpleUploadedFile("food.jpg", data, content_type="image/jpeg"),
+        })
+        return request.FILES["image"]
+
+    def test_small_upload_is_hashed_in_memory(self):
+        data = b"\xff\xd8" + b"x" * 4096
+        file = self.upload(data)
+        self.assertIsInstance(file, InMemoryUploadedFile)
+        self.assertEqual(file.sha256, hashlib.sha256(data).hexdigest())
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_large_upload_is_hashed_on_disk(self):
+        data = b"\xff\xd8" + b"x" * 200_000
+        file = self.upload(data)
+        self.assertIsInstance(file, TemporaryUploadedFile)
+        self.assertEqual(file.sha256, hashlib.sha256(data).hexdigest())
+
+    @override_settings(FOOD_IMAGE_MAX_BYTES=100_000, FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_oversized_upload_is_stopped(self):
+        request = RequestFactory().post("/api/recognize-food/", {
+            "image": SimpleUploadedFile("food.jpg", b"\xff\xd8" + b"x" * 200_000, content_type="image/jpeg"),
+        })
+        self.assertNotIn("image", request.FILES)
+        self.assertIn("larger than", str(request.upload_rejected))
+
+
+class RecognitionSessionTests(SimpleTestCase):
+    result = {
+        "food": "momo", "confidence": 0.97, "food_item_id": 3, "portion_type": "COUNTABLE",
+        "image_path": "food_detection/ab/abc.webp", "model_version": "1234",
+    }
+
+    def test_session_round_trips_without_server_state(self):
+        from .recognition import SESSION_FIELDS, get_session, open_session
+        recognition_id = open_session(dict(self.result))
+        self.assertEqual(get_session(recognition_id), {k: self.result[k] for k in SESSION_FIELDS})
+
+    def test_tampered_or_expired_session_is_rejected(self):
+        from .recognition import get_session, open_session
+        recognition_id = open_session(dict(self.result))
+        self.assertIsNone(get_session(recognition_id[:-1] + ("A" if recognition_id[-1] != "A" else "B")))
+        with override_settings(RECOGNITION_SESSION_TTL=-1):
+            self.assertIsNone(get_session(recognition_id))
+
+
+# a handful of labelled food photos; the exported models must agree with torch on them
+PARITY_FIXTURES = os.getenv("MODEL_PARITY_FIXTURES", "foodapi/fixtures/model_parity")
+
+
+@unittest.skipUnless(importlib.util.find_spec("ultralytics"), "ultralytics is not installed")
+@unittest.skipUnless(os.path.isdir(PARITY_FIXTURES), f"{PARITY_FIXTURES} not found")
+class ExportedModelParityTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from .inference import load_model, model_path, predict_batch
+        from .management.commands.benchmark_model import load_fixtures
+        if not os.path.exists(model_path("torch")):
+            raise unittest.SkipTest(f"{model_path('torch')} not found")
+        cls.paths, cls.images = load_fixtures(PARITY_FIXTURES)
+        if not cls.images:
+            raise unittest.SkipTest(f"no images in {PARITY_FIXTURES}")
+        cls.reference = [p.label for p in predict_batch(load_model("torch"), cls.images)]
+
+    def assert_top1_matches_torch(self, backend):
+        from .inference import load_model, model_path, predict_batch
+        if not os.path.exists(model_path(backend)):
+            self.skipTest(f"{model_path(backend)} not found")
+        labels = [p.label for p in predict_batch(load_model(backend), self.images)]
+        disagree = [path for path, a, b in zip(self.paths, labels, self.reference) if a != b]
+        self.assertEqual(disagree, [], f"{backend} top-1 differs from torch")
+
+    def test_onnx_matches_torch(self):
+        self.assert_top1_matches_torch("onnx")
+
+    def test_onnx_int8_matches_torch(self):
+        self.assert_top1_matches_torch("onnx_int8")
+
+    def test_openvino_matches_torch(self):
+        self.assert_top1_matches_torch("openvino")
@@ -0,0 +1,72 @@
+"""
+Upload handlers that hash image uploads while Django streams them in, so the
+content hash (recognition cache key + stored file name) costs no extra pass
+over the file and the file never has to be held in memory as one bytes object.
+
+Both also stop reading an upload once it passes FOOD_IMAGE_MAX_BYTES instead of
+spooling the rest to disk; the view finds the reason on request.upload_rejected
+and answers 413.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    StopUpload,
+    TemporaryFileUploadHandler,
+)
+
+from .images import ImageRejected, max_upload_bytes
+
+
+def _check_size(handler, raw_data, start):
+    # start = offset of this chunk in the current file
+    max_bytes = max_upload_bytes()
+    if start + len(raw_data) > max_bytes:
+        handler.request.upload_rejected = ImageRejected(
+            f"Image is larger than {max_bytes // (1024 * 1024)} MB"
+        )
+        raise StopUpload(connection_reset=True)
+
+
+class HashingMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """
+    Small uploads (<= FILE_UPLOAD_MAX_MEMORY_SIZE), kept in memory.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # before super(): it raises StopFutureHandlers when this handler is active
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # when not activated the chunk goes on to the temp-file handler, which hashes it
+        if self.activated:
+            _check_size(self, raw_data, start)
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Larger uploads, streamed to a temp file chunk by chunk.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        _check_size(self, raw_data, start)
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
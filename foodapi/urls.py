@@ -1,16 +1,30 @@
 from django.urls import path
+from .async_views import recognize_food_async
 from .views import (
     FoodRecognitionAPIView, 
+    FoodBatchRecognitionAPIView,
     FoodNutritionAPIView, 
+    MealNutritionAPIView,
+    FoodSearchAPIView,
     EatFoodAPIView, 
     FoodLogListAPIView,
-    DailySummaryAPIView  
+    DailySummaryAPIView,
+    TrendsAPIView,
+    InferenceMetricsAPIView,
+    ReadinessAPIView,
 )
 
 urlpatterns = [
     path("recognize-food/", FoodRecognitionAPIView.as_view(), name="recognize"),
+    path("recognize-food/async/", recognize_food_async, name="recognize-async"),
+    path("recognize-food/batch/", FoodBatchRecognitionAPIView.as_view(), name="recognize-batch"),
     path("food-nutrition/", FoodNutritionAPIView.as_view(), name="nutrition"),
+    path("meal-nutrition/", MealNutritionAPIView.as_view(), name="meal-nutrition"),
+    path("food-search/", FoodSearchAPIView.as_view(), name="food-search"),
     path("eat-food/", EatFoodAPIView.as_view(), name="eat"),
     path("food-logs/", FoodLogListAPIView.as_view(), name="logs"),
     path("daily-summary/", DailySummaryAPIView.as_view(), name="summary"),
+    path("trends/", TrendsAPIView.as_view(), name="trends"),
+    path("inference-metrics/", InferenceMetricsAPIView.as_view(), name="inference-metrics"),
+    path("ready/", ReadinessAPIView.as_view(), name="ready"),
 ]
\ No newline at end of file
@@ -1,25 +1,58 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ultralytics import YOLO
-from PIL import Image
 import io
 from rest_framework.permissions import AllowAny
-from django.shortcuts import get_object_or_404
-from .models import FoodItem, PortionType,FoodLog
-from .serializers import FoodNutritionRequestSerializer,FoodLogCreateSerializer,FoodLogSerializer
-from django.core.files.base import ContentFile
+from .models import PortionType,FoodLog,DailyIntake
+from auths.models import UserProfile
+from django.db import transaction
+from django.db.models import FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .serializers import FoodNutritionRequestSerializer,MealNutritionRequestSerializer,FoodLogCreateSerializer,FoodLogSerializer
 from django.core.files.storage import default_storage
 from utils.calculate_nutr import compute_nutrition
+from utils.enums import MACROS
 from rest_framework.permissions import IsAuthenticated
 from django.utils.dateparse import parse_date
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
-# Load model ONCE 
-MODEL_PATH = "models/best.pt"
-model = YOLO(MODEL_PATH)
+from django.conf import settings
+from .inference import InferenceUnavailable, registry, scheduler
+from .images import ImageRejected
+from .recognition import recognize_uploads
+from .catalog import get_catalog
+from .search import search_foods
+from .intake import intake_trends, record_log
+from django.http import Http404
+
+
+def unavailable_response(e):
+    """
+    Overloaded / queue deadline passed -> fast 503 the client can retry
+    """
+    return Response(
+        {"error": str(e)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(getattr(settings, "INFERENCE_RETRY_AFTER", 1))},
+    )
+
+
+def recognition_response(request, result, top_k=False):
+    data = {
+        "recognition_id": result["recognition_id"],
+        "food": result["food"],
+        "confidence": round(result["confidence"], 4),
+        "portion_type": result["portion_type"],
+        "stage": result["stage"],
+        "image_url": request.build_absolute_uri(default_storage.url(result["image_path"])),
+    }
+    if top_k:
+        data["top_k"] = [
+            {"food": label, "confidence": round(conf, 4)} for label, conf in result["top"]
+        ]
+    return data
 
 
 class FoodRecognitionAPIView(APIView):
@@ -30,6 +63,9 @@ class FoodRecognitionAPIView(APIView):
 
     def post(self, request):
         image_file = request.FILES.get("image")
+        rejected = getattr(request, "upload_rejected", None)
+        if rejected:
+            return Response({"error": str(rejected)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
 
         if not image_file:
             return Response(
@@ -38,46 +74,95 @@ class FoodRecognitionAPIView(APIView):
             )
 
         try:
-            # Save image
-            image_path = default_storage.save(
-                f"food_detection/{image_file.name}",
-                ContentFile(image_file.read())
+            result = recognize_uploads([image_file])[0]
+
+            print(
+                f"[FoodRecognition] Detected: {result['food']} | "
+                f"Confidence: {result['confidence']:.4f} | "
+                f"PortionType: {result['portion_type']} | "
+                f"Stage: {result['stage']}"
+                f"{' | cached' if result['cached'] else ''}"
             )
-            image_url = request.build_absolute_uri(default_storage.url(image_path))
 
-            # Re-open image for model
-            image = Image.open(default_storage.open(image_path)).convert("RGB")
+            return Response(recognition_response(request, result))
 
-            # Run classification
-            results = model.predict(image, verbose=False)
-            probs = results[0].probs
+        except ImageRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except InferenceUnavailable as e:
+            return unavailable_response(e)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
 
-            top_index = probs.top1
-            confidence = float(probs.top1conf)
-            label = str(model.names[top_index]).strip().lower()
+class FoodBatchRecognitionAPIView(APIView):
+    """
+    POST several `images` (multipart) -> one result per image, in upload order,
+    with top-k candidates. All images run through the model as one batch.
+    """
+    permission_classes = [AllowAny]
 
-            food_obj = FoodItem.objects.filter(name=label, is_active=True).first()
-            portion_type = food_obj.portion_type if food_obj else None
+    def post(self, request):
+        image_files = request.FILES.getlist("images")
+        rejected = getattr(request, "upload_rejected", None)
+        if rejected:
+            return Response({"error": str(rejected)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        max_images = getattr(settings, "RECOGNITION_BATCH_MAX_IMAGES", 8)
 
-            print(
-                f"[FoodRecognition] Detected: {label} | "
-                f"Confidence: {confidence:.4f} | "
-                f"PortionType: {portion_type}"
+        if not image_files:
+            return Response(
+                {"error": "At least one image is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(image_files) > max_images:
+            return Response(
+                {"error": f"At most {max_images} images per request"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            return Response({
-                "food": label,
-                "confidence": round(confidence, 4),
-                "portion_type": portion_type,
-                "image_url": image_url,
-            })
-
+        try:
+            results = recognize_uploads(image_files)
+        except ImageRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except InferenceUnavailable as e:
+            return unavailable_response(e)
         except Exception as e:
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
+        print(f"[FoodRecognition] Batch of {len(results)}: {', '.join(r['food'] for r in results)}")
+
+        return Response({
+            "results": [recognition_response(request, r, top_k=True) for r in results]
+        })
+
+
+def food_nutrition(catalog, food_name, pieces=None, size=None):
+    """
+    -> (data, None, None) or (None, error, status) for one food entry
+    """
+    food = catalog.get(food_name)
+    if food is None:
+        return None, f"Food '{food_name}' not found", status.HTTP_404_NOT_FOUND
+
+    if food.nutrition is None:
+        return None, f"Nutrition data not found for '{food.name}'", status.HTTP_404_NOT_FOUND
+
+    try:
+        result = compute_nutrition(food, pieces=pieces, size=size)
+    except ValueError as e:
+        return None, str(e), status.HTTP_400_BAD_REQUEST
+
+    return {
+        "food": food.name,
+        "portion_type": food.portion_type,
+        **{k: round(v, 2) if isinstance(v, (int, float)) else v for k, v in result.items()}
+    }, None, None
+
 
 class FoodNutritionAPIView(APIView):
     """
@@ -95,32 +180,117 @@ class FoodNutritionAPIView(APIView):
         pieces = serializer.validated_data.get("pieces")
         size = serializer.validated_data.get("size")
 
-        food = get_object_or_404(FoodItem, name=food_name, is_active=True)
+        catalog = get_catalog()
+        if catalog.get(food_name) is None:
+            raise Http404
 
-        nutrition = getattr(food, "nutrition", None)
-        if not nutrition:
-            return Response(
-                {"error": f"Nutrition data not found for '{food.name}'"},
-                status=status.HTTP_404_NOT_FOUND,
+        data, error, code = food_nutrition(catalog, food_name, pieces=pieces, size=size)
+        if error:
+            return Response({"error": error}, status=code)
+
+        return Response(data)
+
+
+class MealNutritionAPIView(APIView):
+    """
+    POST:
+      { "items": [
+          { "food": "dalbhat", "size": "medium" },
+          { "food": "momo", "pieces": 8 },
+          { "food": "chiya", "size": "small" }
+      ] }
+
+    Every food is resolved from the in-memory catalog; an invalid item gets
+    an {"index", "food", "errors"} entry and is left out of "total".
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = MealNutritionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        catalog = get_catalog()
+        items = []
+        total = dict.fromkeys(MACROS, 0.0)
+
+        for index, entry in enumerate(serializer.validated_data["items"]):
+            if not isinstance(entry, dict):
+                items.append({"index": index, "food": None, "errors": {"detail": ["Expected an object."]}})
+                continue
+
+            item_serializer = FoodNutritionRequestSerializer(data=entry)
+            if not item_serializer.is_valid():
+                food = entry.get("food")
+                items.append({
+                    "index": index,
+                    "food": food.strip().lower() if isinstance(food, str) else None,
+                    "errors": item_serializer.errors,
+                })
+                continue
+
+            validated = item_serializer.validated_data
+            data, error, _ = food_nutrition(
+                catalog, validated["food"], pieces=validated.get("pieces"), size=validated.get("size")
             )
+            if error:
+                items.append({"index": index, "food": validated["food"], "errors": {"detail": [error]}})
+                continue
 
-        try:
-            result = compute_nutrition(food, pieces=pieces, size=size)
-        except ValueError as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            for macro in MACROS:
+                total[macro] += data[macro]
+            items.append({"index": index, **data})
 
         return Response({
-            "food": food.name,
-            "portion_type": food.portion_type,
-            **{k: round(v, 2) if isinstance(v, (int, float)) else v for k, v in result.items()}
+            "items": items,
+            "total": {k: round(v, 2) for k, v in total.items()},
         })
 
 
+class FoodSearchAPIView(APIView):
+    """
+    GET /api/food-search/?q=mom&limit=10
+
+    Ranked, typo-tolerant food name search (exact, prefix, then trigram
+    similarity) over the in-memory catalog.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            return Response(
+                {"error": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_limit = getattr(settings, "FOOD_SEARCH_MAX_RESULTS", 50)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), max_limit)
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            "results": [
+                {
+                    "id": entry.id,
+                    "food": entry.name,
+                    "portion_type": entry.portion_type,
+                    "score": score,
+                }
+                for entry, score in search_foods(query, limit)
+            ]
+        })
 
 
 class EatFoodAPIView(APIView):
     """
     Saves FoodLog and updates user's daily calorie consumption
+
+    The log insert and the DailyIntake increment are one transaction of
+    single-statement writes.
     """
     permission_classes = [IsAuthenticated]
     
@@ -130,11 +300,11 @@ class EatFoodAPIView(APIView):
             context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
-        log = serializer.save()
-        
-        # ✅ Update user's daily calorie consumption
-        profile = request.user.profile
-        profile.add_calories(log.calories or 0)
+
+        with transaction.atomic():
+            log = serializer.save()
+            # ✅ Update user's daily calorie consumption
+            record_log(log)
         
         return Response(
             FoodLogCreateSerializer(log).data,
@@ -186,20 +356,97 @@ class FoodLogListAPIView(ListAPIView):
 # food_api/views.py
 
 class DailySummaryAPIView(APIView):
+    """
+    Pure read: the profile goal and today's DailyIntake row in one query
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile = request.user.profile
-        
-        # Reset calories if new day
-        profile.reset_daily_calories_if_needed()
-        
+        today_intake = DailyIntake.objects.filter(user=OuterRef("user"), date=timezone.localdate())
+        summary = UserProfile.objects.filter(user=request.user).annotate(
+            **{
+                field: Coalesce(
+                    Subquery(today_intake.values(field)[:1]), Value(0),
+                    output_field=IntegerField() if field == "log_count" else FloatField(),
+                )
+                for field in ("calories", "protein", "carbs", "fat", "log_count")
+            }
+        ).values("daily_calorie_goal", "calories", "protein", "carbs", "fat", "log_count").first()
+
+        if summary is None:
+            return Response(
+                {"error": "Profile not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        daily_goal = summary["daily_calorie_goal"]
+        eaten = summary["calories"]
+
         # Calculate remaining
-        remaining = (profile.daily_calorie_goal - profile.calories_consumed_today) if profile.daily_calorie_goal else 0
+        remaining = (daily_goal - eaten) if daily_goal else 0
         
         return Response({
-            "daily_goal": profile.daily_calorie_goal,
-            "total_eaten": profile.calories_consumed_today,
+            "daily_goal": daily_goal,
+            "total_eaten": eaten,
             "remaining": remaining,
-            "percentage_consumed": round((profile.calories_consumed_today / profile.daily_calorie_goal * 100), 2) if profile.daily_calorie_goal else 0
-        })
\ No newline at end of file
+            "percentage_consumed": round((eaten / daily_goal * 100), 2) if daily_goal else 0,
+            "protein": round(summary["protein"], 2),
+            "carbs": round(summary["carbs"], 2),
+            "fat": round(summary["fat"], 2),
+            "log_count": summary["log_count"],
+        })
+
+
+class TrendsAPIView(APIView):
+    """
+    GET /api/trends/?days=7|30|90
+
+    Per-day and per-week calories/macros against daily_calorie_goal, from
+    the DailyIntake rollups (about `days` rows, no FoodLog scan).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        allowed = getattr(settings, "TRENDS_DAYS", [7, 30, 90])
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            days = None
+        if days not in allowed:
+            raise ValidationError({"days": f"Use one of {', '.join(map(str, allowed))}"})
+
+        daily_goal = UserProfile.objects.filter(user=request.user).values_list(
+            "daily_calorie_goal", flat=True
+        ).first()
+
+        return Response({
+            "days": days,
+            "daily_goal": daily_goal,
+            **intake_trends(request.user.id, days, daily_goal),
+        })
+
+
+class InferenceMetricsAPIView(APIView):
+    """
+    GET -> batching stats (batch sizes, queue wait) for tuning the window,
+    queue depth and rejected/expired counts for autoscaling
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(scheduler.stats())
+
+
+class ReadinessAPIView(APIView):
+    """
+    GET -> 200 once the model is loaded and warmed up, 503 before that
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        data = registry.status()
+        return Response(
+            data,
+            status=status.HTTP_200_OK if data["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
@@ -1,5 +1,12 @@
 from django.db import models
 
+MACROS = ("calories", "protein", "carbs", "fat")
+UNITS = ("per_piece", "small", "medium", "large")
+
+# FoodNutrition columns in (unit, macro) order
+NUTRITION_FIELDS = tuple(f"{macro}_{unit}" for unit in UNITS for macro in MACROS)
+
+
 class PortionType(models.TextChoices):
     COUNTABLE = "COUNTABLE", "Countable (pieces)"
     PORTION = "PORTION", "Portion (S/M/L)"
\ No newline at end of file
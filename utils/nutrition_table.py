@@ -0,0 +1,75 @@
+import numpy as np
+
+# NUTRITION_FIELDS is (unit, macro) ordered, so it reshapes to table[food, unit, macro]
+from .enums import MACROS, NUTRITION_FIELDS, UNITS, PortionType
+
+SIZE_CODES = {"small": 1, "medium": 2, "large": 3}
+
+
+def encode_sizes(sizes):
+    """
+    "small"/"medium"/"large" -> 1/2/3, anything else (None, "") -> 0
+    """
+    return np.fromiter((SIZE_CODES.get(s, 0) for s in sizes), dtype=np.int8, count=len(sizes))
+
+
+class NutritionTable:
+    """
+    Dense (food x unit x macro) view of FoodNutrition for bulk recomputation.
+
+    Same rules as compute_nutrition(): COUNTABLE foods scale the per_piece
+    values by pieces, PORTION foods take the row for size, and missing
+    values count as 0. Entries compute_nutrition() would reject (unknown
+    food, no nutrition row, missing pieces/size) come back as NaN rows.
+    """
+
+    def __init__(self, food_ids, portion_types, values):
+        order = np.argsort(food_ids)
+        self.food_ids = np.asarray(food_ids, dtype=np.int64)[order]
+        self.countable = (np.asarray(portion_types) == PortionType.COUNTABLE)[order]
+        self.portion = (np.asarray(portion_types) == PortionType.PORTION)[order]
+        self.values = np.nan_to_num(
+            np.asarray(values, dtype=np.float64).reshape(-1, len(UNITS), len(MACROS))[order]
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        rows: (food_id, portion_type, *NUTRITION_FIELDS)
+        """
+        rows = list(rows)
+        if not rows:
+            return cls([], [], np.empty((0, len(NUTRITION_FIELDS))))
+        food_ids, portion_types, *columns = zip(*rows)
+        values = np.array(list(zip(*columns)), dtype=np.float64)
+        return cls(food_ids, portion_types, values)
+
+    def __len__(self):
+        return len(self.food_ids)
+
+    def compute(self, food_ids, pieces, size_codes):
+        """
+        -> float64 array (n, 4) of calories, protein, carbs, fat
+        """
+        food_ids = np.asarray(food_ids, dtype=np.int64)
+        pieces = np.asarray(pieces, dtype=np.float64)
+        size_codes = np.asarray(size_codes, dtype=np.int8)
+
+        out = np.full((len(food_ids), len(MACROS)), np.nan)
+        if not len(self.food_ids) or not len(food_ids):
+            return out
+
+        idx = np.searchsorted(self.food_ids, food_ids)
+        idx = np.minimum(idx, len(self.food_ids) - 1)
+        known = self.food_ids[idx] == food_ids
+
+        countable = known & self.countable[idx]
+        portion = known & self.portion[idx]
+        valid = (countable & ~np.isnan(pieces)) | (portion & (size_codes > 0))
+
+        unit = np.where(countable, 0, size_codes)
+        factor = np.where(countable, pieces, 1.0)
+
+        rows = self.values[idx[valid], unit[valid]]
+        out[valid] = rows * factor[valid, None]
+        return out